@@ -7,6 +7,15 @@ import sys
 import subprocess
 import tempfile
 import shutil
+import importlib
+
+# 需要能够导入的模块及名称
+IMPORT_NAMES = [
+    ('src.__main__', 'main'),
+    ('src.core.workflow_engine', 'WorkflowEngine'),
+    ('src.extractors.xpath_processor', 'XPathProcessor'),
+    ('src.utils.integration', 'apply_patches'),
+]
 
 def check_installation():
     """检查项目是否可以被正确安装"""
@@ -35,54 +44,43 @@ def check_installation():
         # 获取当前项目的绝对路径
         project_path = os.path.abspath(os.getcwd())
         
-        # 创建一个临时目录
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # 切换到临时目录
-            os.chdir(temp_dir)
-            
-            # 创建一个简单的测试脚本
-            test_script = f"""
-import sys
-import os
-
-# 添加项目根目录到Python路径
-sys.path.insert(0, '{project_path}')
-
-try:
-    from src.__main__ import main
-    print("成功导入main函数")
-    
-    from src.core.workflow_engine import WorkflowEngine
-    print("成功导入WorkflowEngine类")
-    
-    from src.extractors.xpath_processor import XPathProcessor
-    print("成功导入XPathProcessor类")
-    
-    from src.utils.integration import apply_patches
-    print("成功导入apply_patches函数")
-    
-    print("所有导入测试通过")
-    sys.exit(0)
-except ImportError as e:
-    print(f"导入错误: {{e}}")
-    sys.exit(1)
-"""
-            with open('test_import.py', 'w') as f:
-                f.write(test_script)
+        # 直接在当前进程中导入，不必为每次检查启动新的解释器
+        print("\n运行导入测试...")
+        if project_path not in sys.path:
+            sys.path.insert(0, project_path)
+        
+        failed = []
+        for module_name, name in IMPORT_NAMES:
+            try:
+                getattr(importlib.import_module(module_name), name)
+            except (ImportError, AttributeError) as e:
+                print(f"无法导入 {module_name}.{name}: {e}")
+                failed.append(module_name)
+            else:
+                print(f"成功导入{name}: {module_name}")
+        
+        if not failed:
+            print("所有导入测试通过")
+        else:
+            # 导入失败时，在干净的子进程中重新导入以获得完整的错误信息
+            print(f"导入失败: {', '.join(failed)}，在子进程中重新导入以获取详细错误...")
+            test_code = "\n".join(
+                [f"import sys; sys.path.insert(0, {project_path!r})"] +
+                [f"from {module_name} import {name}" for module_name, name in IMPORT_NAMES]
+            )
             
-            # 运行测试脚本
-            print("\n运行导入测试...")
+            # 在临时目录中运行，确保导入依赖的是项目路径而不是当前目录
             result = subprocess.run(
-                [sys.executable, 'test_import.py'],
+                [sys.executable, '-c', test_code],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True
+                text=True,
+                cwd=tempfile.gettempdir()
             )
             
-            print(result.stdout)
-            if result.returncode != 0:
+            if result.stderr:
                 print(f"错误: {result.stderr}")
-                return False
+            return False
     
     except Exception as e:
         print(f"测试过程中出错: {e}")
@@ -3,6 +3,7 @@
 清理项目脚本 - 删除冗余和无用的文件
 """
 import os
+import filecmp
 import shutil
 import sys
 
@@ -59,6 +60,10 @@ def cleanup():
         print("错误：此脚本必须在项目根目录下运行")
         sys.exit(1)
     
+    # 一次读取根目录，后续用字典判断文件/目录是否存在: {名称: 是否为目录}
+    with os.scandir('.') as it:
+        root_entries = {entry.name: entry.is_dir() for entry in it}
+    
     # 创建备份目录（以防万一）
     backup_dir = '_backup_files'
     if not os.path.exists(backup_dir):
@@ -66,24 +71,22 @@ def cleanup():
     
     # 处理源文件
     for file in source_files_to_remove:
-        if os.path.exists(file):
+        if file in root_entries:
             print(f"移动到备份: {file}")
-            shutil.copy2(file, os.path.join(backup_dir, file))
-            os.remove(file)
+            shutil.move(file, os.path.join(backup_dir, file))
     
     # 处理测试文件
     if not os.path.exists('tests/resources'):
         os.makedirs('tests/resources')
     
     for file in test_files_to_move:
-        if os.path.exists(file):
+        if file in root_entries:
             print(f"移动到测试目录: {file}")
-            shutil.copy2(file, os.path.join('tests', file))
-            os.remove(file)
+            shutil.move(file, os.path.join('tests', file))
     
     # 处理日志文件
     for file in log_files_to_remove:
-        if os.path.exists(file):
+        if file in root_entries:
             print(f"删除日志文件: {file}")
             os.remove(file)
     
@@ -93,37 +96,36 @@ def cleanup():
         os.makedirs(config_backup)
     
     for file in config_files_to_handle:
-        if os.path.exists(file):
+        if file in root_entries:
             print(f"移动配置文件: {file}")
-            shutil.copy2(file, os.path.join(config_backup, file))
-            os.remove(file)
+            shutil.move(file, os.path.join(config_backup, file))
     
     # 处理不再需要的目录
     for directory in directories_to_remove:
-        if os.path.exists(directory) and os.path.isdir(directory):
+        if root_entries.get(directory):
             print(f"处理目录: {directory}")
             
-            # 创建相应的备份目录
             backup_subdir = os.path.join(backup_dir, directory)
             if not os.path.exists(backup_subdir):
-                os.makedirs(backup_subdir)
-            
-            # 复制目录内容到备份
-            for item in os.listdir(directory):
-                src_path = os.path.join(directory, item)
-                dst_path = os.path.join(backup_subdir, item)
+                # 整个目录移动到备份，同一文件系统上只是一次重命名
+                shutil.move(directory, backup_subdir)
+            else:
+                # 已有旧备份时，把目录内容合并进去
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        dst_path = os.path.join(backup_subdir, entry.name)
+                        
+                        if entry.is_file():
+                            shutil.move(entry.path, dst_path)
+                        elif entry.is_dir():
+                            shutil.copytree(entry.path, dst_path, dirs_exist_ok=True)
                 
-                if os.path.isfile(src_path):
-                    shutil.copy2(src_path, dst_path)
-                elif os.path.isdir(src_path):
-                    shutil.copytree(src_path, dst_path)
-            
-            # 删除原目录
-            shutil.rmtree(directory)
+                # 删除原目录
+                shutil.rmtree(directory)
             print(f"已移除目录: {directory}")
     
     # 处理根目录下的workflows目录
-    if os.path.exists('workflows') and os.path.isdir('workflows'):
+    if root_entries.get('workflows'):
         print("处理根目录workflows...")
         
         # 确保目标目录存在
@@ -131,32 +133,34 @@ def cleanup():
             os.makedirs('src/workflows')
         
         # 移动所有工作流定义文件到src/workflows
-        for item in os.listdir('workflows'):
-            src_path = os.path.join('workflows', item)
+        with os.scandir('workflows') as it:
+            workflow_files = [(entry.name, entry.path) for entry in it if entry.is_file()]
+        
+        for item, src_path in workflow_files:
             dst_path = os.path.join('src/workflows', item)
             
-            if os.path.isfile(src_path):
-                # 检查目标文件是否已存在
-                if os.path.exists(dst_path):
-                    print(f"文件已存在于目标目录: {item}，比较内容...")
-                    # 如果文件内容相同，则跳过
-                    with open(src_path, 'rb') as f1, open(dst_path, 'rb') as f2:
-                        if f1.read() == f2.read():
-                            print(f"文件内容相同，跳过: {item}")
-                            # 备份原文件
-                            workflows_backup = os.path.join(backup_dir, 'workflows')
-                            if not os.path.exists(workflows_backup):
-                                os.makedirs(workflows_backup)
-                            shutil.copy2(src_path, os.path.join(workflows_backup, item))
-                            continue
-                        else:
-                            print(f"文件内容不同，重命名为: {item}.old")
-                            # 备份目标文件
-                            os.rename(dst_path, f"{dst_path}.old")
-                
-                # 复制文件到目标目录
-                print(f"移动工作流文件: {item}")
-                shutil.copy2(src_path, dst_path)
+            # 检查目标文件是否已存在
+            if os.path.exists(dst_path):
+                print(f"文件已存在于目标目录: {item}，比较内容...")
+                # 如果文件内容相同，则跳过
+                # (先比较大小，大小相同时按块比较，遇到第一个不同处即停止)
+                if os.path.getsize(src_path) == os.path.getsize(dst_path) and \
+                        filecmp.cmp(src_path, dst_path, shallow=False):
+                    print(f"文件内容相同，跳过: {item}")
+                    # 备份原文件
+                    workflows_backup = os.path.join(backup_dir, 'workflows')
+                    if not os.path.exists(workflows_backup):
+                        os.makedirs(workflows_backup)
+                    shutil.copy2(src_path, os.path.join(workflows_backup, item))
+                    continue
+                else:
+                    print(f"文件内容不同，重命名为: {item}.old")
+                    # 备份目标文件
+                    os.rename(dst_path, f"{dst_path}.old")
+            
+            # 复制文件到目标目录
+            print(f"移动工作流文件: {item}")
+            shutil.copy2(src_path, dst_path)
         
         # 创建备份
         workflows_backup = os.path.join(backup_dir, 'workflows')
@@ -164,12 +168,8 @@ def cleanup():
             os.makedirs(workflows_backup)
         
         # 复制整个目录到备份
-        for item in os.listdir('workflows'):
-            src_path = os.path.join('workflows', item)
-            dst_path = os.path.join(workflows_backup, item)
-            
-            if os.path.isfile(src_path):
-                shutil.copy2(src_path, dst_path)
+        for item, src_path in workflow_files:
+            shutil.copy2(src_path, os.path.join(workflows_backup, item))
         
         # 删除原目录
         shutil.rmtree('workflows')
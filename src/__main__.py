@@ -16,6 +16,9 @@ if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
 from src.core.workflow_engine import WorkflowEngine
+from src.core.browser_pool import browser_pool
+from src.utils.event_loop import install_event_loop_policy
+from src.utils.log_queue import queued_handler
 # 引入增强集成模块
 try:
     from src.utils.integration import apply_patches
@@ -28,17 +31,21 @@ logs_dir = os.path.join(parent_dir, 'logs')
 if not os.path.exists(logs_dir):
     os.makedirs(logs_dir)
 
-# 配置日志
+# 配置日志: 终端和文件输出在后台线程中进行，不阻塞事件循环
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(os.path.join(logs_dir, "supercrawler.log"), encoding='utf-8')
+        queued_handler(
+            logging.StreamHandler(),
+            logging.FileHandler(os.path.join(logs_dir, "supercrawler.log"), encoding='utf-8')
+        )
     ]
 )
 logger = logging.getLogger("SuperCrawler")
 
+# 安装了uvloop时使用uvloop事件循环，加快Playwright和aiohttp的网络IO
+install_event_loop_policy()
+
 async def run_workflow(workflow_path, debug=False):
     """运行单个工作流"""
     from datetime import datetime
@@ -50,7 +57,7 @@ async def run_workflow(workflow_path, debug=False):
         if apply_patches():
             logger.info("已应用XPath和字段提取增强补丁")
         
-        engine = WorkflowEngine(workflow_path, logs_dir=logs_dir)
+        engine = WorkflowEngine(workflow_path, logs_dir=logs_dir, debug=debug)
         result = await engine.run()
         
         # 输出结果摘要
@@ -74,29 +81,38 @@ async def run_workflow(workflow_path, debug=False):
         logger.error(f"执行工作流时出错: {e}", exc_info=True)
         return False
     
-async def run_all_workflows(directory, debug=False):
-    """运行目录中的所有工作流"""
-    workflows = []
-    for filename in os.listdir(directory):
-        if filename.endswith('.yaml') or filename.endswith('.yml'):
-            workflows.append(os.path.join(directory, filename))
+async def run_all_workflows(directory, debug=False, concurrency=3):
+    """
+    运行目录中的所有工作流
+
+    各工作流相互独立 (共享浏览器进程，每个工作流使用自己的浏览器上下文)，并发执行，
+    同时运行的工作流数量不超过 concurrency
+    """
+    with os.scandir(directory) as entries:
+        workflows = [entry.path for entry in entries
+                     if entry.name.endswith(('.yaml', '.yml')) and entry.is_file()]
     
     if not workflows:
         logger.warning(f"目录 {directory} 中未找到工作流文件")
         return
     
-    logger.info(f"找到 {len(workflows)} 个工作流")
+    logger.info(f"找到 {len(workflows)} 个工作流，并发数: {concurrency}")
     
-    # 统计结果
-    success_count = 0
-    failed_count = 0
+    semaphore = asyncio.Semaphore(max(1, concurrency))
     
-    for workflow in workflows:
-        success = await run_workflow(workflow, debug)
-        if success:
-            success_count += 1
-        else:
-            failed_count += 1
+    async def run_limited(workflow):
+        async with semaphore:
+            return await run_workflow(workflow, debug)
+    
+    # 单个工作流失败或抛出异常都不会影响其他工作流
+    results = await asyncio.gather(*(run_limited(workflow) for workflow in workflows), return_exceptions=True)
+    
+    # 统计结果，异常按失败计
+    for workflow, outcome in zip(workflows, results):
+        if isinstance(outcome, BaseException):
+            logger.error(f"工作流 {workflow} 执行异常: {outcome}")
+    success_count = sum(1 for outcome in results if outcome is True)
+    failed_count = len(results) - success_count
     
     # 输出总结
     logger.info("\n========== 工作流执行总结 ==========")
@@ -104,13 +120,14 @@ async def run_all_workflows(directory, debug=False):
     logger.info(f"成功: {success_count}")
     logger.info(f"失败: {failed_count}")
 
-async def main():
-    """主函数"""
+async def _main():
+    """解析命令行参数并运行工作流"""
     # 解析命令行参数
     parser = argparse.ArgumentParser(description='SuperCrawler - 灵活的网页爬虫工作流引擎')
     parser.add_argument('workflow', nargs='?', help='工作流文件路径 (.yaml)')
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
     parser.add_argument('--all', action='store_true', help='运行所有工作流')
+    parser.add_argument('--concurrency', type=int, default=3, help='运行所有工作流时同时执行的工作流数量 (默认: 3)')
     args = parser.parse_args()
     
     # 设置调试模式
@@ -131,16 +148,23 @@ async def main():
         root_workflows_dir = os.path.join(parent_dir, 'workflows')
         if os.path.exists(root_workflows_dir) and os.path.isdir(root_workflows_dir):
             logger.info(f"使用项目根目录的工作流: {root_workflows_dir}")
-            await run_all_workflows(root_workflows_dir, args.debug)
+            await run_all_workflows(root_workflows_dir, args.debug, args.concurrency)
         else:
             # 回退到src/workflows目录
             src_workflows_dir = os.path.join(os.path.dirname(__file__), 'workflows')
             if os.path.exists(src_workflows_dir):
                 logger.info(f"使用src目录下的工作流: {src_workflows_dir}")
-                await run_all_workflows(src_workflows_dir, args.debug)
+                await run_all_workflows(src_workflows_dir, args.debug, args.concurrency)
             else:
                 logger.error(f"未找到工作流目录")
                 return
 
+async def main():
+    """主函数，退出前关闭共享的浏览器"""
+    try:
+        await _main()
+    finally:
+        await browser_pool.close()
+
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
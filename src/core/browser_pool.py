@@ -0,0 +1,186 @@
+"""
+浏览器池 - 同一事件循环中的多次工作流运行共享Playwright驱动和浏览器进程
+
+启动Playwright驱动和Chromium进程需要数秒，并发运行多个工作流时同时启动多个浏览器
+还容易因进程数过多而失败。每次运行只从共享的浏览器创建独立的BrowserContext，
+上下文之间的Cookie、缓存和存储互相隔离，创建开销很小。
+没有上下文在使用时浏览器保留 IDLE_TIMEOUT 秒，供随后的运行继续使用，之后自动关闭；
+程序退出前应调用 browser_pool.close() 立即关闭。
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+logger = logging.getLogger("BrowserPool")
+
+# 每个浏览器进程最多创建的上下文数，达到后不再分配新上下文，
+# 已分配的上下文全部归还后关闭该进程，避免长时间运行的浏览器占用的内存不断增长
+MAX_CONTEXTS_PER_BROWSER = 100
+
+# 最后一个上下文归还后，浏览器和Playwright驱动继续保留的秒数
+IDLE_TIMEOUT = 30
+
+class BrowserPool:
+    """按启动参数(headless)共享浏览器进程，为每次工作流运行分配独立的上下文，空闲一段时间后全部关闭"""
+
+    def __init__(self):
+        self._loop = None
+        self._lock = None
+        self._reset()
+
+    def _reset(self):
+        """清空Playwright驱动和浏览器的状态"""
+        self._playwright: Optional[Playwright] = None
+        # headless -> 当前使用的浏览器
+        self._browsers: Dict[bool, Browser] = {}
+        # 浏览器 -> 已创建的上下文数
+        self._uses: Dict[Browser, int] = {}
+        # 浏览器 -> 尚未归还的上下文数
+        self._active: Dict[Browser, int] = {}
+        # 已停止分配、等待上下文全部归还后关闭的浏览器
+        self._retired = set()
+        # 空闲关闭的定时器及其启动的关闭任务
+        self._idle_handle = None
+        self._idle_task = None
+
+    def _bind_loop(self):
+        """Playwright连接属于创建它的事件循环，换了事件循环(如再次 asyncio.run)时丢弃旧的状态"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._reset()
+            self._loop = loop
+            self._lock = asyncio.Lock()
+
+    async def _get_browser(self, headless: bool) -> Browser:
+        """取得可分配上下文的浏览器，必要时启动新的浏览器进程"""
+        browser = self._browsers.get(headless)
+        if browser is not None:
+            if not browser.is_connected():
+                logger.warning("浏览器已断开，重新启动")
+                self._forget(browser)
+                browser = None
+            elif self._uses[browser] >= MAX_CONTEXTS_PER_BROWSER:
+                logger.info(f"浏览器已创建 {MAX_CONTEXTS_PER_BROWSER} 个上下文，启动新的浏览器")
+                del self._browsers[headless]
+                self._retired.add(browser)
+                if not self._active[browser]:
+                    await self._close_browser(browser)
+                browser = None
+
+        if browser is None:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            browser = await self._playwright.chromium.launch(headless=headless)
+            self._browsers[headless] = browser
+            self._uses[browser] = 0
+            self._active[browser] = 0
+            logger.info(f"已启动浏览器，headless: {headless}")
+        return browser
+
+    def _forget(self, browser: Browser):
+        """不再跟踪该浏览器"""
+        for headless, current in list(self._browsers.items()):
+            if current is browser:
+                del self._browsers[headless]
+        self._uses.pop(browser, None)
+        self._active.pop(browser, None)
+        self._retired.discard(browser)
+
+    async def _close_browser(self, browser: Browser):
+        """关闭浏览器进程"""
+        self._forget(browser)
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.debug(f"关闭浏览器失败: {e}")
+
+    async def acquire(self, headless: bool = True, **context_options) -> BrowserContext:
+        """
+        分配一个新的浏览器上下文，首次调用时启动Playwright和浏览器
+
+        参数:
+            headless: 是否使用无头模式
+            context_options: 传给 browser.new_context() 的参数，如 user_agent
+
+        返回:
+            浏览器上下文，用完后必须通过 release() 归还
+        """
+        self._bind_loop()
+        async with self._lock:
+            self._cancel_idle_shutdown()
+            browser = await self._get_browser(headless)
+            self._uses[browser] += 1
+            self._active[browser] += 1
+        try:
+            return await browser.new_context(**context_options)
+        except Exception:
+            await self._release_browser(browser)
+            raise
+
+    async def release(self, context: BrowserContext):
+        """关闭上下文，浏览器进程保留给之后的运行使用 (空闲 IDLE_TIMEOUT 秒后关闭)"""
+        browser = context.browser
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug(f"关闭浏览器上下文失败: {e}")
+        if browser is not None:
+            await self._release_browser(browser)
+
+    async def _release_browser(self, browser: Browser):
+        """减少浏览器的活动上下文计数，已停止分配的浏览器在最后一个上下文归还后关闭"""
+        async with self._lock:
+            if browser not in self._active:
+                return
+            self._active[browser] -= 1
+            if browser in self._retired and not self._active[browser]:
+                await self._close_browser(browser)
+            if not any(self._active.values()):
+                # 没有正在使用的上下文，空闲一段时间后关闭所有浏览器和Playwright驱动
+                self._cancel_idle_shutdown()
+                self._idle_handle = self._loop.call_later(IDLE_TIMEOUT, self._start_idle_shutdown)
+
+    def _cancel_idle_shutdown(self):
+        """取消尚未触发的空闲关闭"""
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+    def _start_idle_shutdown(self):
+        """空闲时间已到，在事件循环中启动关闭任务"""
+        self._idle_handle = None
+        self._idle_task = asyncio.ensure_future(self._idle_shutdown())
+
+    async def _idle_shutdown(self):
+        """等待期间没有新的上下文被分配时关闭浏览器池"""
+        async with self._lock:
+            if self._idle_handle is None and not any(self._active.values()):
+                logger.info(f"浏览器已空闲 {IDLE_TIMEOUT} 秒，关闭浏览器池")
+                await self._shutdown()
+
+    async def close(self):
+        """关闭所有浏览器和Playwright驱动，在程序退出前调用"""
+        if self._loop is not asyncio.get_running_loop():
+            return
+        async with self._lock:
+            self._cancel_idle_shutdown()
+            await self._shutdown()
+
+    async def _shutdown(self):
+        """关闭所有浏览器和Playwright驱动"""
+        if self._playwright is None and not self._uses:
+            return
+        for browser in list(self._uses):
+            await self._close_browser(browser)
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"停止Playwright失败: {e}")
+            self._playwright = None
+        logger.info("已关闭浏览器池")
+
+# 进程内共享的浏览器池
+browser_pool = BrowserPool()
@@ -3,17 +3,20 @@ import json
 import time
 import re
 import os
+import sys
+import random
+import hashlib
 import logging
-from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from collections import deque
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, SplitResult
 
 import yaml
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md
-from playwright.async_api import async_playwright
-import requests
+import aiohttp
 from typing import Dict, List, Set, Optional, Any, Tuple
-from extractor import Extractor
+from src.extractors.extractor import Extractor
+from src.extractors.html_backend import combine_patterns
 
 # 配置日志
 logging.basicConfig(
@@ -21,11 +24,60 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler("crawler.log", encoding='utf-8')
+        logging.FileHandler("crawler.log", encoding='utf-8', delay=True)
     ]
 )
 logger = logging.getLogger("Crawler")
 
+# 默认请求头
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    "Connection": "keep-alive",
+}
+
+# 页面头部<meta charset>声明，只在响应头未给出编码时使用
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+# 文件名中不允许出现的字符
+_FILENAME_SANITIZE_RE = re.compile(r'[\\/*?:"<>|]')
+
+# 文件名哈希不用于安全用途，允许在启用FIPS的OpenSSL上使用更快的实现 (Python 3.9+)
+_MD5_KWARGS = {"usedforsecurity": False} if sys.version_info >= (3, 9) else {}
+
+# 需要重试的HTTP状态码(另外所有5xx都会重试)
+RETRYABLE_STATUS = frozenset({408, 429})
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头，返回需要等待的秒数"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _url_digest(url: str) -> int:
+    """URL的64位摘要，作为整数存入集合比完整URL字符串节省数倍内存"""
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), "big")
+
+def _write_bytes(path: str, data: bytes):
+    """用一次write调用写入整个文件，绕过文本IO包装层"""
+    # Windows上需要O_BINARY，否则换行符会被转换为\r\n
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
 class Crawler:
     """
     爬虫核心类，负责URL的爬取、内容下载和处理
@@ -34,22 +86,39 @@ class Crawler:
                  output_dir: str = "output",
                  delay: float = 2.0,
                  max_retries: int = 3,
-                 timeout: int = 30):
+                 timeout: int = 30,
+                 concurrency: int = 8,
+                 compact_url_sets: bool = False):
         """
         初始化爬虫实例
         
         参数:
             config: 爬虫配置
             output_dir: 输出目录
-            delay: 请求间隔时间(秒)
+            delay: 同一主机的请求间隔时间(秒)，可通过配置中的 host_delays 按主机覆盖
             max_retries: 最大重试次数
             timeout: 请求超时时间(秒)
+            concurrency: 同时进行的最大请求数
+            compact_url_sets: 已访问/失败/已入队集合中只保存URL的64位摘要而不是完整URL，
+                              适用于百万级URL的大规模爬取，代价是极小的摘要碰撞概率
         """
         self.config = config
         self.name = config.get("name", "默认爬虫")
         self.start_url = config.get("start_url")
         self.base_url = config.get("base_url", self._get_base_url(self.start_url))
         self.url_patterns = config.get("url_patterns", {})
+        
+        # 同源检查所需的基础URL组成部分，只解析一次
+        base_parts = urlsplit(self.base_url)
+        self._base_scheme = base_parts.scheme
+        self._base_host = base_parts.netloc.lower()
+        self._base_path = base_parts.path
+        
+        # 预编译URL模式，每类模式合并为一个正则，每个URL只需一次匹配
+        self._include_re = combine_patterns(self.url_patterns.get("include", []))
+        self._exclude_re = combine_patterns(self.url_patterns.get("exclude", []))
+        self._content_re = combine_patterns(self.url_patterns.get("content", []))
+        
         self.schema_id = config.get("schema")
         self.schema = config.get("extraction_schema", {})
         
@@ -57,24 +126,78 @@ class Crawler:
         self.delay = delay
         self.max_retries = max_retries
         self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        
+        # 按主机覆盖请求间隔，如 {"aws.amazon.com": 1.0}，同时匹配其子域名
+        # 按长度降序排列，使更具体的主机优先匹配
+        host_delays = config.get("host_delays", {}) or {}
+        self.host_delays = sorted(((h.lower(), float(d)) for h, d in host_delays.items()),
+                                  key=lambda item: len(item[0]), reverse=True)
         
+        # 按主机限速: 每个主机一把锁 + 下一次允许请求的时间
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._host_locks: Dict[str, asyncio.Lock] = {}
+        self._host_next_time: Dict[str, float] = {}
+        self._host_delay_cache: Dict[str, float] = {}
+        
+        # 集合中保存的键: 完整URL，或开启compact_url_sets时的64位摘要
+        # (str(url) 对字符串直接返回其本身)
+        self._url_key = _url_digest if compact_url_sets else str
         self.visited_urls = set()
         self.failed_urls = set()
         self.extracted_urls = []
-        self.extractor = Extractor(self.base_url)
+        # 配置中的 html_backend 可选 "bs4"(默认) 或 "selectolax"
+        self.extractor = Extractor(self.base_url, backend=config.get("html_backend", "bs4"))
         
         # 创建输出目录
         os.makedirs(self.output_dir, exist_ok=True)
+        self._output_prefix = self.output_dir + os.sep
         
         logger.info(f"初始化爬虫: {self.name}")
         logger.info(f"起始URL: {self.start_url}")
         logger.info(f"基础URL: {self.base_url}")
         logger.info(f"输出目录: {self.output_dir}")
     
-    def start(self, max_urls: int = 100) -> Tuple[int, int]:
+    async def __aenter__(self) -> "Crawler":
+        await self._open_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def _open_session(self) -> aiohttp.ClientSession:
+        """
+        创建共享的HTTP会话
+        
+        连接池在多次 start() 之间复用 (在 async with 中使用时)，
+        同一主机的后续请求无需重新进行TCP和TLS握手。
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=max(64, self.concurrency),
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(
+                headers=DEFAULT_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=connector,
+            )
+        return self._session
+    
+    async def close(self):
+        """关闭HTTP会话及其连接池"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def start(self, max_urls: int = 100) -> Tuple[int, int]:
         """
         启动爬虫，开始处理URL
         
+        同一时间最多有 concurrency 个请求在进行，同一主机的请求之间
+        仍保持 delay 秒的间隔，不同主机之间的请求可以并行。
+        
         参数:
             max_urls: 最大爬取URL数量
             
@@ -85,45 +208,69 @@ class Crawler:
             logger.error("缺少起始URL，爬虫无法启动")
             return 0, 0
         
-        urls_to_visit = [self.start_url]
+        # 待访问队列 + 已入队集合，出队和去重都是O(1)
+        urls_to_visit = deque([self.start_url])
+        queued = {self._url_key(self.start_url)}
         processed_count = 0
         failed_count = 0
+        in_flight: Dict[asyncio.Task, str] = {}
         
         logger.info(f"爬虫启动: {self.name}")
-        logger.info(f"最大URL数量: {max_urls}")
+        logger.info(f"最大URL数量: {max_urls}, 并发数: {self.concurrency}")
         
-        while urls_to_visit and processed_count < max_urls:
-            # 获取下一个URL
-            current_url = urls_to_visit.pop(0)
-            
-            # 如果已经访问过，跳过
-            if current_url in self.visited_urls or current_url in self.failed_urls:
-                continue
-            
-            logger.info(f"处理URL [{processed_count + 1}/{max_urls}]: {current_url}")
-            
-            # 下载并处理页面
-            success, new_urls = self._process_url(current_url)
-            
-            if success:
-                processed_count += 1
-                self.visited_urls.add(current_url)
+        # 在 async with 中使用时会话由上下文管理，否则本次运行结束后关闭
+        owns_session = self._session is None or self._session.closed
+        await self._open_session()
+        try:
+            while (urls_to_visit or in_flight) and processed_count < max_urls:
+                # 在并发上限内派发新的请求
+                while (urls_to_visit and len(in_flight) < self.concurrency and
+                       processed_count + len(in_flight) < max_urls):
+                    current_url = urls_to_visit.popleft()
+                    key = self._url_key(current_url)
+                    
+                    # 如果已经访问过或正在处理，跳过
+                    if (key in self.visited_urls or
+                            key in self.failed_urls or
+                            current_url in in_flight.values()):
+                        continue
+                    
+                    logger.info("处理URL [%d/%d]: %s", processed_count + len(in_flight) + 1, max_urls, current_url)
+                    task = asyncio.ensure_future(self._process_url(current_url))
+                    in_flight[task] = current_url
                 
-                # 添加新发现的URL到队列
-                for url in new_urls:
-                    if (url not in self.visited_urls and 
-                        url not in self.failed_urls and 
-                        url not in urls_to_visit and
-                        self._should_follow_url(url)):
-                        urls_to_visit.append(url)
-                        logger.debug(f"添加新URL到队列: {url}")
-            else:
-                failed_count += 1
-                self.failed_urls.add(current_url)
-            
-            # 请求延迟
-            if urls_to_visit:
-                time.sleep(self.delay)
+                if not in_flight:
+                    continue
+                
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    current_url = in_flight.pop(task)
+                    success, new_urls = task.result()
+                    
+                    if success:
+                        processed_count += 1
+                        self.visited_urls.add(self._url_key(current_url))
+                        
+                        # 添加新发现的URL到队列: 先用集合差一次性去掉已知URL，再做模式过滤
+                        discovered = {self._url_key(url): url for url in new_urls}
+                        fresh = discovered.keys() - self.visited_urls - self.failed_urls - queued
+                        followed = [key for key in fresh if self._should_follow_url(discovered[key])]
+                        if followed:
+                            urls_to_visit.extend(discovered[key] for key in followed)
+                            queued.update(followed)
+                            logger.debug("添加 %d 个新URL到队列", len(followed))
+                    else:
+                        failed_count += 1
+                        self.failed_urls.add(self._url_key(current_url))
+        finally:
+            # 达到上限后取消仍在进行的请求
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            if owns_session:
+                await self.close()
         
         logger.info(f"爬虫 {self.name} 完成")
         logger.info(f"成功处理: {processed_count} 个URL")
@@ -131,7 +278,7 @@ class Crawler:
         
         return processed_count, failed_count
     
-    def _process_url(self, url: str) -> Tuple[bool, List[str]]:
+    async def _process_url(self, url: str) -> Tuple[bool, List[str]]:
         """
         处理单个URL，下载内容并提取信息
         
@@ -139,68 +286,138 @@ class Crawler:
             (是否成功, 提取的新URL列表)
         """
         new_urls = []
+        # 只解析一次URL，供后续各步骤共用
+        parsed = urlsplit(url)
         
         # 尝试下载内容
-        html_content = self._download_page(url)
+        html_content = await self._download_page(url, parsed.netloc)
         if not html_content:
             return False, new_urls
         
         # 提取URL
         try:
+            # 提取器会缓存同一页面的解析结果，URL提取和内容提取共用一次解析；
+            # 使用selectolax后端时，非内容页无需构建BeautifulSoup文档树
             if self.schema:
                 extracted_urls = self.extractor.extract_urls(html_content, self.schema.get("urls", {}))
                 new_urls.extend(extracted_urls)
             
             # 提取内容
-            if self._is_content_page(url):
-                self._extract_and_save_content(url, html_content)
+            if self._is_content_page(url, parsed):
+                self._extract_and_save_content(url, html_content, parsed)
         except Exception as e:
-            logger.error(f"处理URL {url} 时出错: {e}")
+            logger.error("处理URL %s 时出错: %s", url, e)
             return False, new_urls
         
         return True, new_urls
     
-    def _download_page(self, url: str) -> Optional[str]:
+    async def _wait_for_host(self, host: str):
+        """等待直到允许再次请求该主机"""
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            wait = self._host_next_time.get(host, 0.0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._host_next_time[host] = time.monotonic() + self._get_host_delay(host)
+    
+    def _get_host_delay(self, host: str) -> float:
+        """获取某个主机的请求间隔，未配置时使用默认的 delay"""
+        delay = self._host_delay_cache.get(host)
+        if delay is None:
+            delay = self.delay
+            hostname = host.lower()
+            for pattern, value in self.host_delays:
+                if hostname == pattern or hostname.endswith("." + pattern):
+                    delay = value
+                    break
+            self._host_delay_cache[host] = delay
+        return delay
+    
+    async def _download_page(self, url: str, host: Optional[str] = None) -> Optional[str]:
         """下载页面内容"""
+        if host is None:
+            host = urlsplit(url).netloc
+        
         for attempt in range(1, self.max_retries + 1):
+            retry_after = None
             try:
-                logger.debug(f"下载页面 {url} (尝试 {attempt}/{self.max_retries})")
+                logger.debug("下载页面 %s (尝试 %d/%d)", url, attempt, self.max_retries)
                 
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-                    "Connection": "keep-alive",
-                }
+                await self._wait_for_host(host)
                 
-                response = requests.get(url, headers=headers, timeout=self.timeout)
-                response.raise_for_status()
-                
-                # 检查内容类型
-                content_type = response.headers.get("Content-Type", "")
-                if "text/html" not in content_type and "application/xhtml+xml" not in content_type:
-                    logger.warning(f"URL {url} 不是HTML内容: {content_type}")
-                    return None
-                
-                # 设置正确的编码
-                if response.encoding == "ISO-8859-1":
-                    response.encoding = response.apparent_encoding
-                
-                return response.text
+                async with self._session.get(url) as response:
+                    status = response.status
+                    if status >= 400:
+                        # 4xx(408/429除外)是永久性错误，重试没有意义
+                        if status not in RETRYABLE_STATUS and status < 500:
+                            logger.error("下载 %s 失败: HTTP %d，不再重试", url, status)
+                            return None
+                        
+                        retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                        logger.error("下载 %s 失败 (尝试 %d/%d): HTTP %d", url, attempt, self.max_retries, status)
+                    else:
+                        # 检查内容类型
+                        content_type = response.headers.get("Content-Type", "")
+                        if "text/html" not in content_type and "application/xhtml+xml" not in content_type:
+                            logger.warning("URL %s 不是HTML内容: %s", url, content_type)
+                            return None
+                        
+                        body = await response.read()
+                        return self._decode_html(body, response.charset)
             
-            except requests.exceptions.RequestException as e:
-                logger.error(f"下载 {url} 失败 (尝试 {attempt}/{self.max_retries}): {e}")
-                if attempt < self.max_retries:
-                    # 增加重试延迟
-                    time.sleep(self.delay * attempt)
+            except (aiohttp.ClientSSLError, aiohttp.TooManyRedirects, aiohttp.InvalidURL) as e:
+                # 证书错误、重定向循环和无效URL重试也不会成功
+                logger.error("下载 %s 失败: %s，不再重试", url, e)
+                return None
+            
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error("下载 %s 失败 (尝试 %d/%d): %s", url, attempt, self.max_retries, e)
+            
+            if attempt < self.max_retries:
+                # 指数退避加随机抖动，服务器给出Retry-After时至少等待该时长
+                backoff = self.delay * (2 ** (attempt - 1)) + random.uniform(0, self.delay)
+                if retry_after is not None:
+                    backoff = max(backoff, retry_after)
+                await asyncio.sleep(backoff)
         
         return None
     
-    def _extract_and_save_content(self, url: str, html_content: str) -> bool:
-        """提取并保存内容"""
+    def _decode_html(self, body: bytes, charset: Optional[str]) -> str:
+        """
+        将响应字节解码为文本，只解码一次
+        
+        优先使用响应头声明的编码，其次是页面开头的<meta charset>，
+        都没有时先尝试UTF-8，最后才对整个页面做编码检测。
+        """
+        if not charset:
+            match = _META_CHARSET_RE.search(body, 0, 4096)
+            if match:
+                charset = match.group(1).decode("ascii")
+        
+        if charset:
+            try:
+                return body.decode(charset, errors="replace")
+            except LookupError:
+                logger.debug("未知的编码声明: %s", charset)
+        
+        try:
+            return body.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+        
+        # 较慢的编码检测
+        from charset_normalizer import from_bytes
+        best = from_bytes(body).best()
+        if best is not None:
+            return str(best)
+        return body.decode("utf-8", errors="replace")
+    
+    def _extract_and_save_content(self, url: str, html_content: Any,
+                                  parsed: Optional[SplitResult] = None) -> bool:
+        """提取并保存内容，html_content 可以是已解析的文档"""
         try:
             if not self.schema:
-                logger.warning(f"未提供提取模式，无法提取内容: {url}")
+                logger.warning("未提供提取模式，无法提取内容: %s", url)
                 return False
             
             # 提取内容
@@ -208,110 +425,92 @@ class Crawler:
             content = self.extractor.extract_content(html_content, content_schema)
             
             if not content:
-                logger.warning(f"未能从 {url} 提取内容")
+                logger.warning("未能从 %s 提取内容", url)
                 return False
             
             # 添加元数据
             content["url"] = url
-            content["crawled_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            content["crawled_at"] = datetime.now().isoformat(" ", "seconds")
             
             # 保存内容
-            filename = self._generate_filename(url, content)
-            file_path = os.path.join(self.output_dir, filename)
+            stem = self._output_prefix + self._generate_stem(url, content, parsed)
+            file_path = f"{stem}.md"
             
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(content.get("raw_content", ""))
+            _write_bytes(file_path, content.get("raw_content", "").encode("utf-8"))
             
-            # 保存元数据
-            meta_path = os.path.join(self.output_dir, f"{os.path.splitext(filename)[0]}.json")
-            with open(meta_path, "w", encoding="utf-8") as f:
-                import json
-                json.dump(content, f, ensure_ascii=False, indent=2)
+            # 保存元数据，先完整序列化再一次写入
+            meta_path = f"{stem}.json"
+            payload = json.dumps(content, ensure_ascii=False, indent=2).encode("utf-8")
+            _write_bytes(meta_path, payload)
             
-            logger.info(f"内容已保存: {file_path}")
+            logger.info("内容已保存: %s", file_path)
             return True
         
         except Exception as e:
-            logger.error(f"提取和保存内容失败 {url}: {e}")
+            logger.error("提取和保存内容失败 %s: %s", url, e)
             return False
     
-    def _generate_filename(self, url: str, content: Dict) -> str:
-        """根据URL和内容生成文件名"""
+    def _generate_stem(self, url: str, content: Dict,
+                       parsed: Optional[SplitResult] = None) -> str:
+        """根据URL和内容生成不带扩展名的文件名，.md和.json文件共用"""
         # 尝试使用标题
         title = content.get("title", "")
         if title:
             # 清理标题，去除不合法字符
-            import re
-            title = re.sub(r'[\\/*?:"<>|]', "_", title)
+            title = _FILENAME_SANITIZE_RE.sub("_", title)
             title = title.strip()
             if len(title) > 50:
                 title = title[:50]
-            return f"{title}.md"
+            return title
         
         # 使用URL的最后部分
-        path = urlparse(url).path
+        path = (parsed or urlsplit(url)).path
         filename = os.path.basename(path)
         
         if not filename or filename.endswith("/"):
             # 生成基于URL的唯一文件名
-            import hashlib
-            url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-            return f"page_{url_hash}.md"
+            url_hash = hashlib.md5(url.encode(), **_MD5_KWARGS).hexdigest()[:8]
+            return f"page_{url_hash}"
         
-        return f"{os.path.splitext(filename)[0]}.md"
+        return os.path.splitext(filename)[0]
     
-    def _should_follow_url(self, url: str) -> bool:
+    def _should_follow_url(self, url: str, parsed: Optional[SplitResult] = None) -> bool:
         """判断是否应该跟踪此URL"""
-        # 检查是否与基础URL同源
-        if not url.startswith(self.base_url):
+        # 检查是否与基础URL同源: 比较解析后的主机，避免 http://ex.com 误匹配 http://ex.com.evil.example
+        parsed = parsed or urlsplit(url)
+        if (parsed.netloc.lower() != self._base_host or
+                parsed.scheme != self._base_scheme or
+                not parsed.path.startswith(self._base_path)):
             return False
         
-        # 检查URL模式
-        if self.url_patterns:
-            import re
-            # 包含模式
-            include_patterns = self.url_patterns.get("include", [])
-            if include_patterns:
-                matched = False
-                for pattern in include_patterns:
-                    if re.search(pattern, url):
-                        matched = True
-                        break
-                if not matched:
-                    return False
-            
-            # 排除模式
-            exclude_patterns = self.url_patterns.get("exclude", [])
-            for pattern in exclude_patterns:
-                if re.search(pattern, url):
-                    return False
+        # 包含模式
+        if self._include_re and not self._include_re.search(url):
+            return False
+        
+        # 排除模式
+        if self._exclude_re and self._exclude_re.search(url):
+            return False
         
         return True
     
-    def _is_content_page(self, url: str) -> bool:
+    def _is_content_page(self, url: str, parsed: Optional[SplitResult] = None) -> bool:
         """判断URL是否为内容页面"""
         # 如果配置了内容页面模式，使用它
-        content_patterns = self.url_patterns.get("content", [])
-        if content_patterns:
-            import re
-            for pattern in content_patterns:
-                if re.search(pattern, url):
-                    return True
-            return False
+        if self._content_re:
+            return self._content_re.search(url) is not None
         
         # 没有配置时的默认行为：非目录页面都视为内容页面
-        path = urlparse(url).path
+        path = (parsed or urlsplit(url)).path
         return not path.endswith("/")
     
     def _get_base_url(self, url: str) -> str:
         """从URL中提取基础URL"""
-        parsed = urlparse(url)
+        parsed = urlsplit(url)
         return f"{parsed.scheme}://{parsed.netloc}"
     
     def _get_domain(self, url: str) -> str:
         """从URL中获取域名作为目录名"""
-        parsed = urlparse(url)
-        return parsed.netloc
+        return urlsplit(url).netloc
 
 
 # 用于测试
@@ -2,61 +2,217 @@
 工作流引擎 - 执行通过YAML定义的爬虫工作流
 """
 import os
-import yaml
+import re
 import json
+import random
 import logging
 import asyncio
+import functools
+import contextvars
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlsplit
 
-from playwright.async_api import async_playwright, Browser, Page
+import aiohttp
+from playwright.async_api import Browser, Page, TimeoutError as PlaywrightTimeoutError
+from src.core.browser_pool import browser_pool
+
+# orjson为可选依赖，未安装时使用标准库json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from src.utils.element_generalizer import ElementGeneralizer
+from src.utils.config_loader import load_config_file
+from src.utils.log_queue import add_file_log
+from src.extractors.workflow_links_extractor import RESOLVED_LINK_DATA_JS, WorkflowLinksExtractor, dedupe_link_items, resolved_link_items
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("workflow_engine.log", encoding='utf-8')
-    ]
-)
 logger = logging.getLogger("WorkflowEngine")
 
+# 并发执行for_each时，每个任务使用自己的页面和状态 (asyncio任务各自持有上下文副本)
+_task_page = contextvars.ContextVar("workflow_task_page", default=None)
+_task_state = contextvars.ContextVar("workflow_task_state", default=None)
+
+# 不使用浏览器渲染时不加载的资源类型
+_STATIC_BLOCKED_RESOURCES = frozenset({"script", "image", "stylesheet", "font", "media"})
+# 使用浏览器渲染时默认不加载的资源类型，可在配置中通过 block_resources 修改
+_DEFAULT_BLOCKED_RESOURCES = ("image", "font", "media")
+# 常见广告和跟踪服务的域名，配置 block_ads: true 时拦截
+_AD_HOST_RE = re.compile(
+    r'(?:^|\.)(?:doubleclick\.net|googlesyndication\.com|googleadservices\.com|google-analytics\.com'
+    r'|googletagmanager\.com|adservice\.google\.com|amazon-adsystem\.com|adnxs\.com|criteo\.com'
+    r'|taboola\.com|outbrain\.com|scorecardresearch\.com|hotjar\.com|facebook\.net)$'
+)
+# 页面的body部分
+_BODY_RE = re.compile(r'<body[^>]*>(.*?)</body>', re.IGNORECASE | re.DOTALL)
+# body中不算作页面内容的部分: 脚本、样式、noscript (常见于统计代码) 和注释
+_NON_CONTENT_RE = re.compile(r'<(script|style|noscript)\b[^>]*>.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+# 只有空容器 (如单页应用的 <div id="root"></div>)，页面内容由JavaScript生成
+_EMPTY_CONTAINERS_RE = re.compile(r'(?:<(div|main|section)\b[^>]*>\s*</\1\s*>\s*)*', re.IGNORECASE)
+
+# 在浏览器中一次取出第一个匹配元素的内容或属性，不创建元素句柄；没有匹配元素时返回null
+_ELEMENT_VALUE_JS = """(els, attribute) => {
+    const e = els[0];
+    if (!e) return null;
+    switch (attribute.toLowerCase()) {
+        case 'text': return e.textContent;
+        case 'html': return e.innerHTML;
+        case 'outerhtml': return e.outerHTML;
+        default: return e.getAttribute(attribute);
+    }
+}"""
+
+# 模板中的${var}变量引用
+_TEMPLATE_RE = re.compile(r'\$\{([^}]+)\}')
+# 嵌套变量无法解析时的标记
+_MISSING = object()
+
+@functools.lru_cache(maxsize=512)
+def _parse_template(template: str) -> tuple:
+    """
+    把模板拆分为字面文本和变量引用片段，同一模板只解析一次
+
+    返回:
+        片段元组，字面文本为str，变量引用为 (原始引用, 变量路径元组)，
+        如 "a-${x.y}" -> ("a-", ("${x.y}", ("x", "y")))
+    """
+    segments = []
+    pos = 0
+    for match in _TEMPLATE_RE.finditer(template):
+        if match.start() > pos:
+            segments.append(template[pos:match.start()])
+        segments.append((match.group(0), tuple(match.group(1).split('.'))))
+        pos = match.end()
+    if pos < len(template):
+        segments.append(template[pos:])
+    return tuple(segments)
+
+def _write_file(path: str, content: Union[str, bytes]):
+    """写入文件，bytes直接写入，str按UTF-8编码写入"""
+    if isinstance(content, bytes):
+        with open(path, 'wb') as f:
+            f.write(content)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+def _dump_json(data: Any) -> bytes:
+    """
+    序列化为缩进2格、保留非ASCII字符的UTF-8 JSON
+
+    安装了orjson时使用其C实现，比标准库带缩进的纯Python编码器快得多，且直接生成bytes；
+    orjson不支持的数据(如超过64位的整数)回退到标准库
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+@functools.lru_cache(maxsize=512)
+def _playwright_selector(selector: str, selector_type: str = None) -> str:
+    """
+    把工作流中的选择器转换为Playwright选择器表达式，XPath加上 xpath= 前缀
+
+    每个选择器只判断一次类型，之后直接复用缓存的表达式
+
+    参数:
+        selector: CSS或XPath选择器
+        selector_type: 显式指定的类型 (xpath/css)，未指定时按选择器形式判断
+    """
+    if selector.startswith("xpath="):
+        return selector
+    if selector_type:
+        is_xpath = selector_type.lower() == 'xpath'
+    else:
+        is_xpath = selector.startswith(('/', '(', './'))
+    return f"xpath={selector}" if is_xpath else selector
+
+def _needs_javascript(html: str) -> bool:
+    """静态HTML的body去掉脚本、样式和注释后为空或只剩空容器时，认为页面内容需要JavaScript生成"""
+    body = _BODY_RE.search(html)
+    if body is None:
+        return not html.strip()
+    content = _NON_CONTENT_RE.sub('', body.group(1)).strip()
+    return _EMPTY_CONTAINERS_RE.fullmatch(content) is not None
+
+def _is_ad_url(url: str) -> bool:
+    """URL是否属于广告或跟踪服务"""
+    host = urlsplit(url).hostname
+    return bool(host) and _AD_HOST_RE.search(host) is not None
+
+# 同时在后台进行的文件写入数上限，达到后先等待已提交的写入完成
+_MAX_PENDING_WRITES = 32
+
+async def _write_file_async(path: str, content: Union[str, bytes]):
+    """在线程池中写入文件，内容先在内存中拼好后一次写入，磁盘IO不阻塞事件循环"""
+    await asyncio.get_running_loop().run_in_executor(None, _write_file, path, content)
+
 class WorkflowEngine:
     """通用爬虫工作流引擎"""
     
-    def __init__(self, workflow_path: str, logs_dir: str = None):
+    def __init__(self, workflow_path: str, logs_dir: str = None, debug: bool = False):
         """
         初始化工作流引擎
         
         参数:
             workflow_path: 工作流YAML文件路径
             logs_dir: 日志文件目录，默认为当前目录
+            debug: 是否输出完整的数据和状态调试信息，也可在工作流配置中设置 debug: true
         """
         self.workflow_path = workflow_path
+        self.debug = debug
         self.workflow = None
         self.browser = None
         self.context = None
-        self.page = None
-        self.current_state = {}
+        self._page = None
+        self._current_state = {}
+        # use_browser为false时用于直接获取静态页面的HTTP会话
+        self._http_session = None
         self.output_data = []
+        # save动作发起的文件写入任务，在工作流结束时统一等待完成
+        self._pending_writes = []
+        # 每个文件最近一次提交的写入任务，同一文件的写入按提交顺序进行
+        self._writes_by_path = {}
+        # 后台写入失败的错误信息，工作流结束时并入运行结果
+        self._write_errors = []
+        # 已创建的输出目录，每个目录只创建一次
+        self._created_dirs = set()
+        # 各页面当前文档的HTML缓存 (页面 -> HTML)，页面导航或点击后失效
+        self._html_cache = {}
         
         # 配置日志目录
         self.logs_dir = logs_dir if logs_dir else "."
         if not os.path.exists(self.logs_dir):
             os.makedirs(self.logs_dir)
             
-        # 配置单独的文件日志处理器
-        workflow_log_path = os.path.join(self.logs_dir, "workflow_engine.log")
-        file_handler = logging.FileHandler(workflow_log_path, encoding='utf-8')
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        logger.addHandler(file_handler)
+        # 配置单独的文件日志，在后台线程中写入，多个引擎实例共用同一个处理器
+        add_file_log(logger, os.path.join(self.logs_dir, "workflow_engine.log"))
         
         self.element_generalizer = ElementGeneralizer(logs_dir=self.logs_dir)
         logger.info(f"初始化工作流引擎，工作流路径: {workflow_path}")
         
+    @property
+    def page(self) -> Optional[Page]:
+        """当前页面，并发for_each任务中为该任务自己的页面"""
+        return _task_page.get() or self._page
+    
+    @page.setter
+    def page(self, value: Optional[Page]):
+        self._page = value
+    
+    @property
+    def current_state(self) -> Dict[str, Any]:
+        """状态变量，并发for_each任务中为该任务自己的副本"""
+        state = _task_state.get()
+        return state if state is not None else self._current_state
+    
+    @current_state.setter
+    def current_state(self, value: Dict[str, Any]):
+        self._current_state = value
+    
     async def load_workflow(self) -> bool:
         """
         加载工作流定义
@@ -65,8 +221,8 @@ class WorkflowEngine:
             是否成功加载
         """
         try:
-            with open(self.workflow_path, 'r', encoding='utf-8') as f:
-                self.workflow = yaml.safe_load(f)
+            self.workflow = load_config_file(self.workflow_path)
+            self.debug = self.debug or bool(self.workflow.get('config', {}).get('debug', False))
             
             # 验证工作流基本结构
             if not self._validate_workflow():
@@ -116,6 +272,9 @@ class WorkflowEngine:
         """
         运行工作流
         
+        浏览器进程由浏览器池管理，同时或先后运行的工作流共享同一个浏览器；
+        浏览器空闲一段时间后自动关闭，调用方在不再运行工作流时应调用 browser_pool.close() 立即关闭
+        
         返回:
             运行结果
         """
@@ -144,12 +303,9 @@ class WorkflowEngine:
             
             # 执行起始步骤 - 访问起始URL
             start_url = self.workflow['start']['url']
-            await self.page.goto(start_url)
+            await self._goto(start_url)
             logger.info(f"已访问起始URL: {start_url}")
             
-            # 等待页面加载完成
-            await self.page.wait_for_load_state('networkidle')
-            
             # 执行工作流步骤
             current_step_name = self.workflow['flow'][0]['step']
             steps_executed = 0
@@ -189,11 +345,10 @@ class WorkflowEngine:
             # 保存输出数据
             if self.output_data:
                 output_dir = self.workflow.get('output_directory', 'output')
-                os.makedirs(output_dir, exist_ok=True)
+                self._ensure_dir(output_dir)
                 output_file = os.path.join(output_dir, f"{self.workflow['workflow_name'].lower().replace(' ', '_')}.json")
                 
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.output_data, f, ensure_ascii=False, indent=2)
+                await _write_file_async(output_file, _dump_json(self.output_data))
                 
                 logger.info(f"已保存输出数据到: {output_file}")
                 result["output_file"] = output_file
@@ -203,28 +358,107 @@ class WorkflowEngine:
             result["errors"].append(f"执行错误: {str(e)}")
         
         finally:
+            # 等待所有文件写入完成，写入失败计入运行错误
+            write_errors = await self._flush_writes()
+            if write_errors:
+                result["errors"].extend(write_errors)
+                result["success"] = False
             # 关闭浏览器
             await self._close_browser()
         
         return result
     
+    def _ensure_dir(self, path: str):
+        """创建目录，同一目录在一次运行中只创建一次"""
+        if path not in self._created_dirs:
+            os.makedirs(path, exist_ok=True)
+            self._created_dirs.add(path)
+    
+    async def _queue_write(self, path: str, content: Union[str, bytes], description: str):
+        """
+        在后台写入文件，爬取与磁盘IO重叠进行
+
+        同一文件的写入按提交顺序进行；后台写入数达到 _MAX_PENDING_WRITES 时先等待已提交的写入完成
+
+        参数:
+            path: 文件路径
+            content: 文件内容
+            description: 写入完成后的日志说明，如 "已保存Markdown文件"
+        """
+        if len(self._pending_writes) >= _MAX_PENDING_WRITES:
+            await self._wait_for_writes()
+        key = os.path.abspath(path)
+        task = asyncio.ensure_future(self._write_in_background(path, content, description, self._writes_by_path.get(key), key))
+        self._pending_writes.append(task)
+        self._writes_by_path[key] = task
+    
+    async def _write_in_background(self, path: str, content: Union[str, bytes], description: str, previous, key: str):
+        """等待同一文件之前的写入完成后写入文件，完成后记录日志，失败时记录错误"""
+        try:
+            if previous is not None:
+                await previous
+            await _write_file_async(path, content)
+            logger.info(f"{description}: {path}")
+        except Exception as e:
+            logger.error(f"写入文件出错: {path}: {e}")
+            self._write_errors.append(f"写入文件 {path} 失败: {e}")
+        finally:
+            # 本任务是该文件最近一次的写入时，之后的写入无需再等待
+            if self._writes_by_path.get(key) is asyncio.current_task():
+                del self._writes_by_path[key]
+    
+    async def _wait_for_writes(self):
+        """等待已提交的后台文件写入完成"""
+        if not self._pending_writes:
+            return
+        pending, self._pending_writes = self._pending_writes, []
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def _flush_writes(self) -> List[str]:
+        """
+        等待所有后台文件写入完成
+
+        返回:
+            尚未报告的写入错误
+        """
+        await self._wait_for_writes()
+        errors, self._write_errors = self._write_errors, []
+        return errors
+    
+    async def _page_content(self) -> str:
+        """
+        获取当前页面的HTML
+
+        page.content() 每次都要序列化整个DOM，同一文档上的多次提取共用一份缓存
+        """
+        page = self.page
+        html_content = self._html_cache.get(page)
+        if html_content is None:
+            html_content = await page.content()
+            self._html_cache[page] = html_content
+        return html_content
+    
+    def _invalidate_page_content(self, page: Optional[Page] = None):
+        """页面文档可能已改变(导航、点击、等待)时丢弃其HTML缓存"""
+        self._html_cache.pop(page or self.page, None)
+    
     async def _init_browser(self):
-        """初始化浏览器"""
+        """初始化浏览器，浏览器进程由浏览器池共享，每次运行使用独立的上下文"""
         logger.info("初始化浏览器")
         try:
             config = self.workflow.get('config', {})
             headless = config.get('headless', True)
             user_agent = config.get('user_agent')
             
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(headless=headless)
-            
             browser_context_options = {}
             if user_agent:
                 browser_context_options['user_agent'] = user_agent
             
-            self.context = await self.browser.new_context(**browser_context_options)
+            self.context = await browser_pool.acquire(headless, **browser_context_options)
+            self.browser = self.context.browser
+            await self._block_resources(config)
             self.page = await self.context.new_page()
+            self._html_cache.clear()
             
             # 设置页面超时
             timeout = config.get('timeout', 30000)
@@ -236,16 +470,142 @@ class WorkflowEngine:
             logger.error(f"初始化浏览器失败: {e}", exc_info=True)
             raise
     
+    async def _block_resources(self, config: Dict):
+        """
+        在上下文中拦截提取内容用不到的资源，页面更快加载完成
+
+        配置中 block_resources 为要拦截的资源类型列表 (默认图片、字体和媒体，设为空列表则不拦截)，
+        block_ads 为true时同时拦截常见广告和跟踪服务的请求；上下文中的所有页面都会生效
+        """
+        blocked = frozenset(config.get('block_resources', _DEFAULT_BLOCKED_RESOURCES) or ())
+        block_ads = config.get('block_ads', False)
+        if not blocked and not block_ads:
+            return
+        
+        async def handle_route(route):
+            request = route.request
+            if request.resource_type in blocked or (block_ads and _is_ad_url(request.url)):
+                await route.abort()
+            else:
+                await route.continue_()
+        
+        await self.context.route("**/*", handle_route)
+        logger.info(f"拦截资源类型: {', '.join(sorted(blocked)) or '无'}，拦截广告: {bool(block_ads)}")
+    
+    def _load_state(self) -> str:
+        """
+        导航和点击后等待的页面加载状态，配置中 wait_until 指定，默认 domcontentloaded
+
+        networkidle 要求网络空闲至少500毫秒，每个页面都要多等这段时间；提取前改为等待要提取的元素
+        (见 _wait_for_element)，页面脚本较慢的网站可以配置回 networkidle 或 load
+        """
+        return self.workflow.get('config', {}).get('wait_until', 'domcontentloaded')
+    
+    def _element_timeout(self) -> int:
+        """等待元素出现的最长时间(毫秒)，配置中 element_timeout 指定，默认5000，0为不等待"""
+        return self.workflow.get('config', {}).get('element_timeout', 5000)
+    
+    async def _wait_for_element(self, selector: str):
+        """
+        等待选择器匹配的元素出现在DOM中，页面脚本生成的内容可能在DOMContentLoaded之后才出现
+
+        等待时间由配置中 element_timeout 指定(毫秒，默认5000，0为不等待)，超时后照常提取
+
+        参数:
+            selector: Playwright选择器
+        """
+        timeout = self._element_timeout()
+        if not timeout:
+            return
+        try:
+            await self.page.locator(selector).first.wait_for(state='attached', timeout=timeout)
+        except PlaywrightTimeoutError:
+            logger.debug(f"等待元素超时: {selector}")
+        except Exception as e:
+            # 选择器无效等错误留给随后的提取处理
+            logger.debug(f"等待元素失败: {selector}: {e}")
+    
+    async def _goto(self, url: str):
+        """
+        在当前页面中打开URL并等待加载完成 (默认等到DOMContentLoaded，见 _load_state)
+        
+        配置中 use_browser 为 false 时，先用HTTP请求直接获取HTML，由浏览器在不执行脚本、
+        不加载图片/样式等资源的情况下渲染；页面看起来需要JavaScript生成内容时回退到完整加载
+        """
+        self._invalidate_page_content()
+        if self.workflow.get('config', {}).get('use_browser', True):
+            await self.page.goto(url, wait_until=self._load_state())
+            return
+        
+        html = await self._fetch_static(url)
+        if html is None:
+            logger.info(f"页面需要浏览器渲染: {url}")
+            await self.page.goto(url, wait_until=self._load_state())
+            return
+        
+        async def handle_route(route):
+            request = route.request
+            # 主框架的文档请求直接返回已获取的HTML
+            if request.resource_type == "document" and request.frame.parent_frame is None:
+                await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+            elif request.resource_type in _STATIC_BLOCKED_RESOURCES:
+                await route.abort()
+            else:
+                await route.continue_()
+        
+        page = self.page
+        await page.route("**/*", handle_route)
+        try:
+            await page.goto(url, wait_until="domcontentloaded")
+        finally:
+            await page.unroute("**/*", handle_route)
+    
+    async def _fetch_static(self, url: str) -> Optional[str]:
+        """
+        直接通过HTTP获取页面HTML
+        
+        请求超时使用配置中的 timeout。该会话与浏览器上下文相互独立，只发送配置的 user_agent，
+        浏览器中设置的Cookie和其他请求头不会带上，需要登录状态的页面不要关闭 use_browser
+        
+        返回:
+            HTML内容；请求失败或页面内容需要JavaScript生成时返回None
+        """
+        try:
+            if self._http_session is None or self._http_session.closed:
+                config = self.workflow.get('config', {})
+                headers = {}
+                user_agent = config.get('user_agent')
+                if user_agent:
+                    headers['User-Agent'] = user_agent
+                timeout = aiohttp.ClientTimeout(total=config.get('timeout', 30000) / 1000)
+                self._http_session = aiohttp.ClientSession(headers=headers, timeout=timeout)
+            
+            async with self._http_session.get(url) as response:
+                if response.status != 200 or 'html' not in response.headers.get('Content-Type', ''):
+                    return None
+                html = await response.text(errors='replace')
+        except Exception as e:
+            logger.warning(f"直接获取页面失败: {url}, 错误: {e}")
+            return None
+        
+        if _needs_javascript(html):
+            return None
+        return html
+    
     async def _close_browser(self):
-        """关闭浏览器"""
+        """关闭本次运行的页面，把上下文归还浏览器池，浏览器进程留给之后的运行使用"""
         logger.info("关闭浏览器")
         try:
+            if self._http_session:
+                await self._http_session.close()
+                self._http_session = None
             if self.page:
                 await self.page.close()
+                self.page = None
             if self.context:
-                await self.context.close()
-            if self.browser:
-                await self.browser.close()
+                await browser_pool.release(self.context)
+                self.context = None
+            self.browser = None
         except Exception as e:
             logger.error(f"关闭浏览器时出错: {e}")
     
@@ -289,22 +649,11 @@ class WorkflowEngine:
                 logger.info(f"处理循环: 找到 {len(items)} 个项目")
                 
                 # 执行每个项目的操作
-                for idx, item in enumerate(items):
-                    logger.info(f"处理for_each项目 {idx+1}/{len(items)}")
-                    # 设置当前项目在状态中
-                    self.current_state["current_item"] = item
-                    
-                    # 输出调试信息
-                    if isinstance(item, dict):
-                        logger.info(f"当前项目属性: {', '.join(item.keys())}")
-                    
-                    # 执行项目的操作
-                    for action in step['actions']:
-                        action_result = await self._execute_action(action)
-                        if not action_result["success"]:
-                            logger.error(f"执行for_each项目操作失败: {action_result.get('error')}")
-                            result["error"] = f"for_each项目操作失败: {action_result.get('error')}"
-                            return result
+                failed = await self._run_for_each(items, step['actions'])
+                if failed:
+                    logger.error(f"执行for_each项目操作失败: {failed.get('error')}")
+                    result["error"] = f"for_each项目操作失败: {failed.get('error')}"
+                    return result
                 
                 result["success"] = True
                 return result
@@ -330,15 +679,16 @@ class WorkflowEngine:
                         break
                     
                     # 检查下一页按钮是否存在
-                    next_button = await self.page.query_selector(next_button_selector)
-                    if not next_button:
+                    next_button = self.page.locator(next_button_selector).first
+                    if not await next_button.count():
                         logger.info("找不到下一页按钮，分页结束")
                         break
                     
                     # 点击下一页
                     logger.info(f"点击下一页按钮，当前页: {current_page}")
                     await next_button.click()
-                    await self.page.wait_for_load_state('networkidle')
+                    self._invalidate_page_content()
+                    await self.page.wait_for_load_state(self._load_state())
                     
                     # 执行页面操作
                     for action in step['actions']:
@@ -357,6 +707,102 @@ class WorkflowEngine:
         
         return result
     
+    async def _run_for_each(self, items: List[Any], actions: List[Dict]) -> Optional[Dict[str, Any]]:
+        """
+        对每个项目执行一组操作
+        
+        配置中 max_concurrency 大于1时，多个项目并发执行，每个项目使用独立的页面和状态副本，
+        等待页面加载的时间得以重叠；request_delay 为每个项目开始前的随机延迟上限(秒)，用于分散请求
+        
+        参数:
+            items: 项目列表
+            actions: 每个项目要执行的操作
+            
+        返回:
+            第一个失败操作的结果，全部成功时返回None
+        """
+        config = self.workflow.get('config', {})
+        max_concurrency = config.get('max_concurrency', 1)
+        
+        if max_concurrency <= 1 or len(items) <= 1:
+            for idx, item in enumerate(items):
+                logger.info(f"处理for_each项目 {idx+1}/{len(items)}")
+                # 设置当前项目在状态中
+                self.current_state["current_item"] = item
+                
+                # 输出调试信息
+                if isinstance(item, dict) and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("当前项目属性: %s", ', '.join(item.keys()))
+                
+                # 执行项目的操作
+                for action in actions:
+                    action_result = await self._execute_action(action)
+                    if not action_result["success"]:
+                        return action_result
+            return None
+        
+        request_delay = config.get('request_delay', 0)
+        timeout = config.get('timeout', 30000)
+        base_state = self.current_state
+        
+        # 页面池: 预先创建固定数量的页面，各任务轮流使用，避免每个项目都新建和关闭页面；
+        # 池中的页面数同时也限制了并发数
+        pool_size = min(max_concurrency, len(items))
+        pool = asyncio.Queue()
+        pages = []
+        for _ in range(pool_size):
+            page = await self.context.new_page()
+            page.set_default_timeout(timeout)
+            pages.append(page)
+            pool.put_nowait(page)
+        
+        async def process_item(idx: int, item: Any) -> Optional[Dict[str, Any]]:
+            page = await pool.get()
+            try:
+                if request_delay:
+                    await asyncio.sleep(random.uniform(0, request_delay))
+                
+                logger.info(f"处理for_each项目 {idx+1}/{len(items)}")
+                
+                # 在本任务的上下文中切换到独立的页面和状态
+                state = dict(base_state)
+                state["current_item"] = item
+                _task_page.set(page)
+                _task_state.set(state)
+                
+                for action in actions:
+                    action_result = await self._execute_action(action)
+                    if not action_result["success"]:
+                        return action_result
+                return None
+            finally:
+                # 回到空白页释放上一个页面占用的资源，再放回池中
+                self._invalidate_page_content(page)
+                try:
+                    await page.goto("about:blank")
+                except Exception as e:
+                    logger.debug(f"重置页面失败: {e}")
+                pool.put_nowait(page)
+        
+        logger.info(f"并发处理 {len(items)} 个项目，最大并发数: {pool_size}")
+        try:
+            results = await asyncio.gather(*(process_item(idx, item) for idx, item in enumerate(items)),
+                                           return_exceptions=True)
+        finally:
+            for page in pages:
+                self._invalidate_page_content(page)
+                try:
+                    await page.close()
+                except Exception as e:
+                    logger.debug(f"关闭页面失败: {e}")
+        
+        for item_result in results:
+            if isinstance(item_result, Exception):
+                return {"success": False, "error": str(item_result)}
+            if item_result:
+                return item_result
+        return None
+    
     async def _execute_action(self, action: Dict) -> Dict[str, Any]:
         """
         执行操作
@@ -380,7 +826,7 @@ class WorkflowEngine:
                 return result
             
             # 打印调试信息
-            logger.info(f"执行操作: {action_type}")
+            logger.debug("执行操作: %s", action_type)
             
             # 根据操作类型执行不同的操作
             if action_type == "visit":
@@ -393,15 +839,14 @@ class WorkflowEngine:
                     current_item = self.current_state.get("current_item", {})
                     if isinstance(current_item, dict) and 'href' in current_item:
                         url = current_item['href']
-                        logger.info(f"从current_item中获取URL: {url}")
+                        logger.debug("从current_item中获取URL: %s", url)
                 
                 if not url:
                     result["error"] = "URL未定义"
                     return result
                 
                 logger.info(f"访问URL: {url}")
-                await self.page.goto(url)
-                await self.page.wait_for_load_state('networkidle')
+                await self._goto(url)
                 
                 result["success"] = True
                 
@@ -429,15 +874,15 @@ class WorkflowEngine:
             elif action_type == "save":
                 # 保存数据
                 raw_data = action.get('data')
-                logger.info(f"原始数据模板: {raw_data}")
-                
-                # 打印当前状态变量，帮助调试
-                logger.info(f"当前状态变量: {list(self.current_state.keys())}")
-                if 'article_data' in self.current_state:
-                    logger.info(f"article_data内容: {self.current_state['article_data']}")
-                
                 data = self._resolve_variables(raw_data)
-                logger.info(f"解析后的数据: {data}")
+                
+                # 调试模式下打印数据模板和状态变量，正常运行时不格式化整份数据
+                if self.debug:
+                    logger.info(f"原始数据模板: {raw_data}")
+                    logger.info(f"当前状态变量: {list(self.current_state.keys())}")
+                    if 'article_data' in self.current_state:
+                        logger.info(f"article_data内容: {self.current_state['article_data']}")
+                    logger.info(f"解析后的数据: {data}")
                 
                 if not data:
                     result["error"] = "保存数据为空"
@@ -447,35 +892,15 @@ class WorkflowEngine:
                 format_type = action.get('format')
                 if format_type:
                     raw_filename = action.get('filename', f"output_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format_type}")
-                    logger.info(f"原始文件名: {raw_filename}")
+                    logger.debug("原始文件名: %s", raw_filename)
                     
                     # 解析文件名中的变量
-                    filename = self._resolve_variables(raw_filename)
-                    logger.info(f"解析后的文件名: {filename}")
-                    
-                    # 如果文件名解析失败，尝试手动替换常见变量
-                    if '${' in filename:
-                        logger.warning(f"文件名中仍有未解析的变量: {filename}")
-                        
-                        # 尝试手动解析常见变量
-                        if isinstance(data, dict):
-                            for key, value in data.items():
-                                if isinstance(value, str):
-                                    var_pattern = f"${{article_data.{key}}}"
-                                    if var_pattern in filename:
-                                        filename = filename.replace(var_pattern, value)
-                                        logger.info(f"手动替换变量 {var_pattern} 为 {value}")
-                                        
-                            # 替换其他常见变量
-                            var_pattern = "${article_data.date}"
-                            if var_pattern in filename:
-                                current_date = datetime.now().strftime("%Y%m%d")
-                                filename = filename.replace(var_pattern, current_date)
-                                logger.info(f"替换日期变量为当前日期: {current_date}")
+                    filename = self._resolve_filename(str(raw_filename), data)
+                    logger.debug("解析后的文件名: %s", filename)
                     
                     # 获取输出目录
                     output_dir = self.workflow.get('config', {}).get('output_directory', 'output')
-                    os.makedirs(output_dir, exist_ok=True)
+                    self._ensure_dir(output_dir)
                     
                     # 完整文件路径
                     file_path = os.path.join(output_dir, filename)
@@ -494,16 +919,10 @@ class WorkflowEngine:
                         md_content += f"{content}\n"
                         
                         # 保存到文件
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            f.write(md_content)
-                        
-                        logger.info(f"已保存Markdown文件: {file_path}")
+                        await self._queue_write(file_path, md_content, "已保存Markdown文件")
                     else:
                         # 默认保存为JSON
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            json.dump(data, f, ensure_ascii=False, indent=2)
-                        
-                        logger.info(f"已保存数据文件: {file_path}")
+                        await self._queue_write(file_path, _dump_json(data), "已保存数据文件")
                 
                 # 将数据添加到输出列表
                 if isinstance(data, list):
@@ -525,13 +944,21 @@ class WorkflowEngine:
                 selector = self._resolve_variables(selector)
                 
                 logger.info(f"点击元素: {selector}")
-                element = await self.page.query_selector(selector)
-                if not element:
+                # 定位和点击在一次调用中完成，元素出现前最多等待 element_timeout；
+                # element_timeout 为0时不等待 (Playwright的timeout=0表示不限时，因此先检查元素是否存在)
+                element_timeout = self._element_timeout()
+                locator = self.page.locator(selector).first
+                found = bool(element_timeout) or await locator.count() > 0
+                if found:
+                    try:
+                        await locator.click(timeout=element_timeout or None)
+                    except PlaywrightTimeoutError:
+                        found = False
+                if not found:
                     result["error"] = f"找不到点击元素: {selector}"
                     return result
-                
-                await element.click()
-                await self.page.wait_for_load_state('networkidle')
+                self._invalidate_page_content()
+                await self.page.wait_for_load_state(self._load_state())
                 
                 result["success"] = True
                 
@@ -540,6 +967,8 @@ class WorkflowEngine:
                 timeout = action.get('timeout', 1000)
                 logger.info(f"等待 {timeout} 毫秒")
                 await asyncio.sleep(timeout / 1000)
+                # 等待期间页面脚本可能修改了DOM
+                self._invalidate_page_content()
                 result["success"] = True
                 
             elif action_type == "for_each":
@@ -555,17 +984,10 @@ class WorkflowEngine:
                     return result
                 
                 # 执行每个项目的操作
-                for idx, item in enumerate(items):
-                    logger.info(f"处理嵌套for_each项目 {idx+1}/{len(items)}")
-                    # 设置当前项目在状态中
-                    self.current_state["current_item"] = item
-                    
-                    # 执行项目的操作
-                    for sub_action in action.get('actions', []):
-                        action_result = await self._execute_action(sub_action)
-                        if not action_result["success"]:
-                            logger.error(f"执行嵌套for_each项目操作失败: {action_result.get('error')}")
-                            return action_result
+                failed = await self._run_for_each(items, action.get('actions', []))
+                if failed:
+                    logger.error(f"执行嵌套for_each项目操作失败: {failed.get('error')}")
+                    return failed
                 
                 result["success"] = True
                 
@@ -601,6 +1023,17 @@ class WorkflowEngine:
                 result["error"] = "链接元素定义未提供"
                 return result
             
+            # 直接提取整页链接，不使用选择器
+            if element_def.get('prefer_js_extraction', False):
+                items = dedupe_link_items(await WorkflowLinksExtractor.extract_page_links(self.page, self.page.url))
+                output_name = action.get('output')
+                if output_name:
+                    self.current_state[output_name] = items
+                    logger.info(f"已提取 {len(items)} 个链接，保存到状态变量: {output_name}")
+                result["success"] = True
+                result["extracted_count"] = len(items)
+                return result
+            
             # 获取样例选择器
             sample_selector = element_def.get('sample')
             if not sample_selector:
@@ -610,11 +1043,9 @@ class WorkflowEngine:
             # 是否需要泛化
             should_generalize = element_def.get('generalize', True)
             
-            # 获取HTML内容
-            html_content = await self.page.content()
-            
-            # 如果需要泛化，使用泛化器
+            # 如果需要泛化，使用泛化器 (只有泛化需要整页HTML)
             if should_generalize:
+                html_content = await self._page_content()
                 logger.info(f"使用泛化器处理样例选择器: {sample_selector}")
                 generalize_result = self.element_generalizer.generalize_selector(html_content, sample_selector)
                 
@@ -630,44 +1061,17 @@ class WorkflowEngine:
                 # 不需要泛化，直接使用原始选择器
                 selector = sample_selector
             
-            # 使用选择器查找元素
-            is_xpath = self.element_generalizer._is_xpath(selector)
-            
             items = []
             base_url = self.page.url
             
-            if is_xpath:
-                # 直接使用Playwright的locator API
-                elements = await self.page.locator(selector).all()
-                for element in elements:
-                    href = await element.get_attribute('href')
-                    text = await element.text_content()
-                    
-                    if href:
-                        # 构建完整URL
-                        from urllib.parse import urljoin
-                        full_url = urljoin(base_url, href)
-                        
-                        items.append({
-                            'href': full_url,
-                            'text': text.strip() if text else ''
-                        })
-            else:
-                # 使用CSS选择器
-                elements = await self.page.query_selector_all(selector)
-                for element in elements:
-                    href = await element.get_attribute('href')
-                    text = await element.text_content()
-                    
-                    if href:
-                        # 构建完整URL
-                        from urllib.parse import urljoin
-                        full_url = urljoin(base_url, href)
-                        
-                        items.append({
-                            'href': full_url,
-                            'text': text.strip() if text else ''
-                        })
+            # XPath和CSS选择器都交给Playwright的locator，一次调用取出所有元素的链接和文本，
+            # 链接已由浏览器解析为绝对URL
+            await self._wait_for_element(selector)
+            link_data = await self.page.locator(selector).evaluate_all(RESOLVED_LINK_DATA_JS)
+            items = resolved_link_items(link_data, base_url)
+            
+            # 去除重复链接，避免同一页面被重复访问
+            items = dedupe_link_items(items)
             
             # 保存提取的URLs
             output_name = action.get('output')
@@ -693,8 +1097,9 @@ class WorkflowEngine:
             elements_def = action.get('elements', [])
             
             # 打印调试信息
-            logger.info(f"提取内容开始, elements类型: {type(elements_def)}")
-            logger.info(f"元素定义: {elements_def}")
+            logger.debug("提取内容开始, elements类型: %s", type(elements_def).__name__)
+            if self.debug:
+                logger.info(f"元素定义: {elements_def}")
             
             # 初始化提取数据
             extracted_data = {}
@@ -717,6 +1122,11 @@ class WorkflowEngine:
                     # 是否需要泛化
                     should_generalize = element_def.get('generalize', False)
                     
+                    # 只等待第一个字段的元素出现，页面内容生成后其余字段直接查询，
+                    # 页面上缺失的可选字段不会各自等待到超时
+                    if not extracted_data:
+                        await self._wait_for_element(_playwright_selector(sample_selector))
+                    
                     # 提取元素内容
                     content = await self._extract_single_element(sample_selector, should_generalize)
                     extracted_data[element_name] = content
@@ -736,6 +1146,10 @@ class WorkflowEngine:
                         logger.warning(f"元素 {name} 没有定义选择器，跳过")
                         continue
                     
+                    # 只等待第一个字段的元素出现 (同上)
+                    if not extracted_data:
+                        await self._wait_for_element(_playwright_selector(selector, selector_type))
+                    
                     # 提取元素内容
                     content = await self._extract_with_selector(name, selector, selector_type, attribute)
                     extracted_data[name] = content
@@ -752,7 +1166,10 @@ class WorkflowEngine:
             output_var = action.get('output', 'extracted_data')
             self.current_state[output_var] = extracted_data
             
-            logger.info(f"提取内容完成，结果: {extracted_data}")
+            if self.debug:
+                logger.info(f"提取内容完成，结果: {extracted_data}")
+            else:
+                logger.info(f"提取内容完成，共 {len(extracted_data)} 个字段")
             
             result["success"] = True
             result["data"] = extracted_data
@@ -764,9 +1181,7 @@ class WorkflowEngine:
             logger.error(f"错误堆栈: {error_trace}")
             
             # 打印当前action结构，帮助调试
-            import pprint
-            logger.error(f"当前action结构:")
-            logger.error(pprint.pformat(action))
+            logger.error("当前action结构: %r", action)
             
             result["error"] = f"提取内容时出错: {str(e)}"
         
@@ -784,42 +1199,32 @@ class WorkflowEngine:
             元素内容
         """
         try:
-            # 获取HTML内容
-            html_content = await self.page.content()
-            
-            # 如果需要泛化，使用泛化器
+            # 如果需要泛化，使用泛化器 (只有泛化需要整页HTML)
             if should_generalize:
-                logger.info(f"使用泛化器处理选择器: {selector}")
+                html_content = await self._page_content()
+                logger.debug("使用泛化器处理选择器: %s", selector)
                 generalize_result = self.element_generalizer.generalize_selector(html_content, selector)
                 
                 if generalize_result["success"]:
                     # 使用泛化后的选择器
                     selector = generalize_result["generalized"]
-                    logger.info(f"成功泛化选择器: {selector}")
+                    logger.debug("成功泛化选择器: %s", selector)
                 else:
                     # 泛化失败，使用原始选择器
                     logger.warning(f"选择器泛化失败，使用原始选择器: {selector}")
             
-            # 使用选择器查找元素
-            is_xpath = self.element_generalizer._is_xpath(selector)
-            content = ""
-            
-            if is_xpath:
-                # 使用XPath选择器
-                element = await self.page.query_selector(f"xpath={selector}")
-            else:
-                # 使用CSS选择器
-                element = await self.page.query_selector(selector)
+            # 使用选择器查找元素 (元素的等待由 _extract_content 统一处理)
+            content = await self.page.locator(_playwright_selector(selector)).evaluate_all(_ELEMENT_VALUE_JS, 'text')
                 
-            if element:
-                content = await element.text_content()
-                if content:
-                    content = content.strip()
-                    logger.info(f"成功提取内容: {content[:50]}...")
-                else:
-                    logger.warning(f"元素内容为空: {selector}")
-            else:
+            if content is None:
                 logger.warning(f"未找到匹配元素: {selector}")
+                return ""
+            
+            content = content.strip()
+            if content:
+                logger.debug("成功提取内容: %s...", content[:50])
+            else:
+                logger.warning(f"元素内容为空: {selector}")
             
             return content
         
@@ -841,7 +1246,7 @@ class WorkflowEngine:
             提取的内容
         """
         try:
-            logger.info(f"提取元素 {name}，选择器: {selector}，类型: {selector_type}")
+            logger.debug("提取元素 %s，选择器: %s，类型: %s", name, selector, selector_type)
             
             content = None
             if selector_type.lower() == 'xpath':
@@ -873,33 +1278,15 @@ class WorkflowEngine:
                     logger.error(f"JavaScript执行XPath出错: {js_error}")
                     
                     # 回退到直接使用Playwright的XPath
-                    element = await self.page.query_selector(f"xpath={selector}")
-                    if element:
-                        if attribute.lower() == 'text':
-                            content = await element.text_content()
-                        elif attribute.lower() == 'html':
-                            content = await element.inner_html()
-                        elif attribute.lower() == 'outerhtml':
-                            content = await element.outer_html()
-                        else:
-                            content = await element.get_attribute(attribute)
+                    content = await self.page.locator(_playwright_selector(selector, 'xpath')).evaluate_all(_ELEMENT_VALUE_JS, attribute)
             else:
                 # 使用CSS选择器
-                element = await self.page.query_selector(selector)
-                if element:
-                    if attribute.lower() == 'text':
-                        content = await element.text_content()
-                    elif attribute.lower() == 'html':
-                        content = await element.inner_html()
-                    elif attribute.lower() == 'outerhtml':
-                        content = await element.outer_html()
-                    else:
-                        content = await element.get_attribute(attribute)
+                content = await self.page.locator(_playwright_selector(selector, 'css')).evaluate_all(_ELEMENT_VALUE_JS, attribute)
             
             if content:
                 if isinstance(content, str):
                     content = content.strip()
-                logger.info(f"成功提取元素 {name}: {str(content)[:50]}...")
+                logger.debug("成功提取元素 %s: %.50s...", name, content)
             else:
                 logger.warning(f"没有找到元素 {name}，选择器: {selector}")
             
@@ -909,6 +1296,76 @@ class WorkflowEngine:
             logger.error(f"使用选择器提取 {name} 时出错: {str(e)}")
             return None
     
+    def _lookup_variable(self, parts: tuple):
+        """
+        按路径查找状态中的变量，如 ('article_data', 'title')
+
+        返回:
+            变量值；嵌套变量无法解析时返回 _MISSING
+        """
+        if len(parts) == 1:
+            # 简单变量
+            return self.current_state.get(parts[0])
+        
+        # 处理嵌套变量, 如 article_data.title
+        root_value = self.current_state.get(parts[0])
+        if not root_value or not isinstance(root_value, dict):
+            logger.warning(f"变量 {parts[0]} 不存在或不是字典: {root_value}")
+            return _MISSING
+        
+        current = root_value
+        for part in parts[1:]:
+            if isinstance(current, dict) and part in current:
+                current = current[part]
+            else:
+                logger.warning(f"无法解析嵌套变量 {'.'.join(parts)} 的部分 {part}")
+                return _MISSING
+        return current
+    
+    def _resolve_filename(self, raw_filename: str, data: Any) -> str:
+        """
+        解析保存文件名中的变量引用，一次遍历完成所有替换
+
+        状态中无法解析的 ${article_data.字段} 使用本次保存数据中的字符串字段，
+        ${article_data.date} 仍无法解析时使用当前日期；其他无法解析的引用保持原样
+
+        参数:
+            raw_filename: 文件名模板
+            data: 本次保存的数据
+
+        返回:
+            解析后的文件名
+        """
+        if '${' not in raw_filename:
+            return raw_filename
+        
+        resolved = []
+        unresolved = False
+        for segment in _parse_template(raw_filename):
+            if isinstance(segment, str):
+                resolved.append(segment)
+                continue
+            
+            token, parts = segment
+            value = self._lookup_variable(parts)
+            if (value is None or value is _MISSING) and len(parts) == 2 and parts[0] == 'article_data':
+                field_value = data.get(parts[1]) if isinstance(data, dict) else None
+                if isinstance(field_value, str):
+                    value = field_value
+                elif parts[1] == 'date':
+                    value = datetime.now().strftime("%Y%m%d")
+            
+            if value is None or value is _MISSING:
+                unresolved = True
+                resolved.append(token)
+            else:
+                resolved.append(str(value))
+        
+        filename = ''.join(resolved)
+        if unresolved:
+            logger.warning(f"文件名中仍有未解析的变量: {filename}")
+        return filename
+    
     def _resolve_variables(self, value):
         """
         解析变量引用，将${var}替换为状态中的值
@@ -922,74 +1379,27 @@ class WorkflowEngine:
         if not value:
             return value
         
-        logger.debug(f"解析变量: {value}, 类型: {type(value)}")
-        
         if isinstance(value, str):
-            # 如果是形如${var}的完整变量引用
-            if value.startswith('${') and value.endswith('}'):
-                var_path = value[2:-1]
-                logger.debug(f"解析完整变量引用: {var_path}")
-                
-                # 处理嵌套变量, 如 article_data.title
-                if '.' in var_path:
-                    parts = var_path.split('.')
-                    root_var = parts[0]
-                    root_value = self.current_state.get(root_var)
-                    
-                    if not root_value or not isinstance(root_value, dict):
-                        logger.warning(f"变量 {root_var} 不存在或不是字典: {root_value}")
-                        return value
-                    
-                    current = root_value
-                    for part in parts[1:]:
-                        if isinstance(current, dict) and part in current:
-                            current = current[part]
-                        else:
-                            logger.warning(f"无法解析嵌套变量 {var_path} 的部分 {part}")
-                            return value
-                    
-                    logger.debug(f"成功解析嵌套变量 {var_path} 为 {current}")
-                    return current
-                else:
-                    # 简单变量
-                    return self.current_state.get(var_path)
-            
-            # 替换字符串中的所有${var}变量引用
-            import re
-            def replace_var(match):
-                var_path = match.group(1)
-                logger.debug(f"替换内联变量: {var_path}")
-                
-                # 处理嵌套变量
-                if '.' in var_path:
-                    parts = var_path.split('.')
-                    root_var = parts[0]
-                    root_value = self.current_state.get(root_var)
-                    
-                    if not root_value or not isinstance(root_value, dict):
-                        logger.warning(f"变量 {root_var} 不存在或不是字典: {root_value}")
-                        return match.group(0)
-                    
-                    try:
-                        current = root_value
-                        for part in parts[1:]:
-                            if isinstance(current, dict) and part in current:
-                                current = current[part]
-                            else:
-                                logger.warning(f"无法解析嵌套变量 {var_path} 的部分 {part}")
-                                return match.group(0)
-                        
-                        logger.debug(f"成功解析嵌套变量 {var_path} 为 {current}")
-                        return str(current) if current is not None else match.group(0)
-                    except Exception as e:
-                        logger.error(f"解析嵌套变量 {var_path} 出错: {e}")
-                        return match.group(0)
-                else:
-                    # 简单变量
-                    var_value = self.current_state.get(var_path)
-                    return str(var_value) if var_value is not None else match.group(0)
+            if '${' not in value:
+                return value
             
-            return re.sub(r'\${([^}]+)}', replace_var, value)
+            segments = _parse_template(value)
+            
+            # 如果是形如${var}的完整变量引用，返回变量原本的值(可以是字典、列表等)
+            if len(segments) == 1 and not isinstance(segments[0], str):
+                var_value = self._lookup_variable(segments[0][1])
+                return value if var_value is _MISSING else var_value
+            
+            # 替换字符串中的所有${var}变量引用，无法解析的引用保持原样
+            resolved = []
+            for segment in segments:
+                if isinstance(segment, str):
+                    resolved.append(segment)
+                    continue
+                token, parts = segment
+                var_value = self._lookup_variable(parts)
+                resolved.append(token if var_value is None or var_value is _MISSING else str(var_value))
+            return ''.join(resolved)
         
         elif isinstance(value, dict):
             # 递归处理字典
@@ -1016,7 +1426,10 @@ async def main():
         return
     
     engine = WorkflowEngine(workflow_path)
-    result = await engine.run()
+    try:
+        result = await engine.run()
+    finally:
+        await browser_pool.close()
     
     print("\n工作流执行结果:")
     print(f"成功: {result['success']}")
@@ -1032,4 +1445,10 @@ async def main():
             print(f"- {error}")
 
 if __name__ == "__main__":
+    from src.utils.event_loop import install_event_loop_policy
+    from src.utils.log_queue import queued_handler
+    
+    # 配置日志
+    logging.basicConfig(level=logging.INFO, handlers=[queued_handler(logging.StreamHandler())])
+    install_event_loop_policy()
     asyncio.run(main()) 
\ No newline at end of file
@@ -1,10 +1,11 @@
 import os
-import json
 import yaml
 from pathlib import Path
 import logging
 from typing import List, Dict, Any, Optional
 
+from src.utils.config_loader import load_config_file
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -43,8 +44,7 @@ class WorkflowManager:
         for wf_file in workflow_files:
             try:
                 workflow_path = os.path.join(self.workflows_dir, wf_file)
-                with open(workflow_path, 'r', encoding='utf-8') as f:
-                    workflow_config = yaml.safe_load(f)
+                workflow_config = load_config_file(workflow_path)
                 
                 # 验证工作流配置
                 if not self._validate_workflow(workflow_config):
@@ -77,12 +77,7 @@ class WorkflowManager:
         for schema_file in schema_files:
             try:
                 schema_path = os.path.join(schemas_dir, schema_file)
-                if schema_file.endswith('.json'):
-                    with open(schema_path, 'r', encoding='utf-8') as f:
-                        schema = json.load(f)
-                else:
-                    with open(schema_path, 'r', encoding='utf-8') as f:
-                        schema = yaml.safe_load(f)
+                schema = load_config_file(schema_path)
                 
                 schema_id = schema.get('id', os.path.splitext(schema_file)[0])
                 self.schemas[schema_id] = schema
@@ -213,8 +208,7 @@ class WorkflowManager:
         logger.info(f"正在加载工作流: {workflow_path}")
         
         try:
-            with open(workflow_path, 'r', encoding='utf-8') as f:
-                workflow = yaml.safe_load(f)
+            workflow = load_config_file(workflow_path)
             
             # 验证工作流配置
             if not self._validate_workflow(workflow):
@@ -1,33 +1,167 @@
 import json
 import logging
 import re
-from urllib.parse import urljoin, urlparse
+import os
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin, urlsplit
 from bs4 import BeautifulSoup
+import soupsieve
 import markdownify
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union, Tuple
+from src.extractors.html_backend import (HtmlBackend, BS4Backend, compile_css, get_backend, combine_patterns,
+                                         select_first, remove_elements,
+                                         SKIP_LINK_PREFIXES, CONTENT_FALLBACK_SELECTORS)
 
 # 配置日志
 logger = logging.getLogger("Extractor")
 
+@functools.lru_cache(maxsize=256)
+def _compile_xpath(expression: str):
+    """编译XPath表达式并缓存"""
+    import lxml.etree
+    return lxml.etree.XPath(expression)
+
+# 共享的Markdown转换器，直接转换已解析的元素，无需先序列化再重新解析
+_MARKDOWN = markdownify.MarkdownConverter(heading_style="ATX")
+
+# 连续空白
+_WS_RE = re.compile(r'\s+')
+# 元数据字段及其候选meta名称 (按优先级排列)
+_META_TAGS = {
+    'description': ['description', 'og:description'],
+    'keywords': ['keywords'],
+    'author': ['author', 'og:author'],
+    'published_time': ['article:published_time', 'og:published_time', 'published_time'],
+    'modified_time': ['article:modified_time', 'og:modified_time', 'modified_time'],
+    'image': ['og:image', 'twitter:image']
+}
+_META_NAMES = frozenset(name for names in _META_TAGS.values() for name in names)
+# 每个字段优先级最高的名称
+_META_PRIMARY_NAMES = frozenset(names[0] for names in _META_TAGS.values())
+
+# 工作进程内的提取器实例，由 _init_worker 在每个进程启动时创建一次
+_worker_extractor = None
+
+def _init_worker(base_url: str, parser: str) -> None:
+    """进程池初始化函数：在工作进程中创建提取器，编译缓存在进程内按需重建"""
+    global _worker_extractor
+    _worker_extractor = Extractor(base_url, parser)
+
+def _extract_content_worker(page: Tuple[str, Dict]) -> Dict[str, Any]:
+    """在工作进程中提取单个页面的内容"""
+    html_content, content_schema = page
+    return _worker_extractor.extract_content(html_content, content_schema)
+
 class Extractor:
     """
     内容提取器，负责从HTML内容中提取URLs和结构化数据
     """
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, parser: str = 'lxml', backend: str = 'bs4'):
         """
         初始化提取器
         
         参数:
             base_url: 基础URL，用于将相对URL转换为绝对URL
+            parser: BeautifulSoup使用的解析器，默认使用C实现的lxml；
+                    未安装lxml时可传入'html.parser'
+            backend: 从HTML字符串提取URL时使用的解析后端，"bs4"(默认)或"selectolax"；
+                     内容提取依赖markdownify，始终使用BeautifulSoup
         """
         self.base_url = base_url
+        base_parts = urlsplit(base_url)
+        self._base_netloc = base_parts.netloc
+        # 同源URL的前缀，如 "https://example.com"
+        self._base_prefix = f"{base_parts.scheme}://{base_parts.netloc}"
+        self._parser = parser
+        self._backend = get_backend(backend, parser)
+        # 处理BeautifulSoup文档树的后端
+        self._soup_backend = self._backend if isinstance(self._backend, BS4Backend) else BS4Backend(parser)
+        # 最近一次解析的HTML及其文档树，同一页面多次调用时不再重复解析
+        self._last_html = None
+        self._last_soup = None
+    
+    def parse(self, html_content: str) -> BeautifulSoup:
+        """
+        使用配置的解析器(默认lxml)解析HTML
+        
+        同一页面解析一次后，可将结果传给 extract_*_from_soup 共用；
+        对同一HTML字符串重复调用时直接返回缓存的文档树
+        """
+        if html_content is self._last_html and self._last_soup is not None:
+            return self._last_soup
+        soup = BeautifulSoup(html_content, self._parser)
+        self._last_html = html_content
+        self._last_soup = soup
+        return soup
+    
+    def __getstate__(self):
+        """序列化时不携带解析缓存，保证实例可以传给其他进程"""
+        state = self.__dict__.copy()
+        state['_last_html'] = None
+        state['_last_soup'] = None
+        return state
+    
+    def extract_batch(self, pages: List[Tuple[str, Dict]],
+                      max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        使用多进程并行提取多个页面的内容
+        
+        解析和Markdown转换都是纯Python的CPU密集操作，受GIL限制无法在线程间并行，
+        因此分发到进程池中，按核心数扩展
+        
+        参数:
+            pages: (HTML内容, 内容提取模式配置) 元组列表
+            max_workers: 进程数，默认为CPU核心数
+            
+        返回:
+            与 pages 顺序一致的提取结果列表
+        """
+        if not pages:
+            return []
+        
+        workers = min(max_workers or os.cpu_count() or 1, len(pages))
+        if workers <= 1:
+            return [self.extract_content(html, schema) for html, schema in pages]
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.base_url, self._parser)) as executor:
+                chunksize = max(1, len(pages) // (workers * 4))
+                return list(executor.map(_extract_content_worker, pages, chunksize=chunksize))
+        except Exception as e:
+            logger.error(f"多进程提取内容时出错，改为在当前进程中提取: {e}")
+            return [self.extract_content(html, schema) for html, schema in pages]
+    
+    def _css(self, selector: str) -> soupsieve.SoupSieve:
+        """获取编译后的CSS选择器"""
+        return compile_css(selector)
     
-    def extract_urls(self, html_content: str, url_schema: Dict) -> List[str]:
+    def _is_same_domain(self, url: str) -> bool:
+        """
+        判断URL是否与基础URL同域名
+        
+        常见的同源URL只需一次前缀比较，其他情况(如协议不同)再用urlsplit比较域名
+        """
+        prefix = self._base_prefix
+        if url.startswith(prefix):
+            n = len(prefix)
+            if len(url) == n or url[n] in '/?#':
+                return True
+        return urlsplit(url).netloc == self._base_netloc
+    
+    def _as_soup(self, html_content: Union[str, BeautifulSoup]) -> BeautifulSoup:
+        """已解析的文档直接返回，否则解析HTML字符串"""
+        if isinstance(html_content, BeautifulSoup):
+            return html_content
+        return self.parse(html_content)
+    
+    def extract_urls(self, html_content: Union[str, BeautifulSoup], url_schema: Dict) -> List[str]:
         """
         从HTML内容中提取URLs
         
         参数:
-            html_content: HTML内容
+            html_content: HTML内容，或 parse() 返回的已解析文档
             url_schema: URL提取模式配置
             
         返回:
@@ -37,11 +171,36 @@ class Extractor:
             logger.warning("HTML内容为空，无法提取URL")
             return []
         
+        try:
+            if isinstance(html_content, BeautifulSoup):
+                tree, backend = html_content, self._soup_backend
+            elif self._backend is self._soup_backend:
+                tree, backend = self.parse(html_content), self._soup_backend
+            else:
+                tree, backend = self._backend.parse(html_content), self._backend
+        except Exception as e:
+            logger.error(f"提取URL时出错: {e}")
+            return []
+        return self._extract_urls_from_tree(tree, url_schema, backend)
+    
+    def extract_urls_from_soup(self, soup: BeautifulSoup, url_schema: Dict) -> List[str]:
+        """
+        从已解析的文档中提取URLs
+        
+        参数:
+            soup: parse() 返回的已解析文档
+            url_schema: URL提取模式配置
+            
+        返回:
+            提取的URL列表
+        """
+        return self._extract_urls_from_tree(soup, url_schema, self._soup_backend)
+    
+    def _extract_urls_from_tree(self, tree: Any, url_schema: Dict, backend: HtmlBackend) -> List[str]:
+        """通过解析后端从文档树中提取URLs"""
         urls = set()  # 使用集合去重
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
             # 获取配置 - 支持新旧字段名
             container_selector = url_schema.get("container", url_schema.get("container_selector", "body"))
             link_selector = url_schema.get("link_selector", "a")
@@ -49,67 +208,62 @@ class Extractor:
             
             # 查找容器元素
             if container_selector != "body":
-                containers = soup.select(container_selector)
+                containers = backend.select(tree, container_selector)
                 if not containers:
                     logger.warning(f"未找到容器元素: {container_selector}，使用整个文档")
-                    containers = [soup]
+                    containers = [tree]
             else:
-                containers = [soup]
+                containers = [tree]
             
             # 从每个容器中提取链接
             for container in containers:
-                links = container.select(link_selector)
+                links = backend.select(container, link_selector)
                 logger.debug(f"在容器中找到 {len(links)} 个链接元素")
                 
                 for link in links:
-                    url = link.get(attribute)
+                    url = backend.attr(link, attribute)
                     if url:
-                        # 跳过空链接、锚点链接和JavaScript链接
-                        if not url or url.startswith('#') or url.startswith('javascript:'):
+                        # 跳过锚点、JavaScript、邮件和电话链接
+                        if url.startswith(SKIP_LINK_PREFIXES):
                             continue
                         
-                        # 将相对URL转换为绝对URL
-                        absolute_url = urljoin(self.base_url, url)
+                        # 将相对URL转换为绝对URL (已是绝对URL时无需urljoin)
+                        if url.startswith(('http://', 'https://')):
+                            absolute_url = url
+                        else:
+                            absolute_url = urljoin(self.base_url, url)
                         
                         # 只保留同域名的URL
-                        if urlparse(absolute_url).netloc == urlparse(self.base_url).netloc:
+                        if self._is_same_domain(absolute_url):
                             urls.add(absolute_url)
                         else:
                             logger.debug(f"跳过外部链接: {absolute_url}")
                             
-            # 过滤URL
+            # 过滤URL (urls已去重，过滤结果直接生成列表返回，无需再转集合)
             if url_schema.get("patterns"):
-                filtered_urls = []
-                include_patterns = url_schema.get("patterns", {}).get("include", [])
-                exclude_patterns = url_schema.get("patterns", {}).get("exclude", [])
+                include_re = combine_patterns(url_schema["patterns"].get("include", []))
+                exclude_re = combine_patterns(url_schema["patterns"].get("exclude", []))
                 
-                for url in urls:
-                    # 应用包含模式
-                    if include_patterns:
-                        if not any(re.search(pattern, url) for pattern in include_patterns):
-                            continue
-                    
-                    # 应用排除模式
-                    if exclude_patterns and any(re.search(pattern, url) for pattern in exclude_patterns):
-                        continue
-                    
-                    filtered_urls.append(url)
-                
-                urls = set(filtered_urls)
+                # 应用包含模式和排除模式，每个URL各只需一次正则匹配
+                result = [url for url in urls
+                          if (include_re is None or include_re.search(url))
+                          and (exclude_re is None or not exclude_re.search(url))]
+            else:
+                result = list(urls)
             
-            logger.info(f"提取到 {len(urls)} 个URL")
-            return list(urls)
+            logger.info(f"提取到 {len(result)} 个URL")
+            return result
             
         except Exception as e:
             logger.error(f"提取URL时出错: {e}")
             return []
     
-    def extract_content(self, html_content: str, content_schema: Dict) -> Dict[str, Any]:
+    def extract_content(self, html_content: Union[str, BeautifulSoup], content_schema: Dict) -> Dict[str, Any]:
         """
         从HTML内容中提取结构化内容
         
         参数:
-            html_content: HTML内容
+            html_content: HTML内容，或 parse() 返回的已解析文档
             content_schema: 内容提取模式配置
             
         返回:
@@ -119,30 +273,54 @@ class Extractor:
             logger.warning("HTML内容为空，无法提取内容")
             return {}
         
+        try:
+            soup = self._as_soup(html_content)
+        except Exception as e:
+            logger.error(f"提取内容时出错: {e}")
+            return {}
+        return self.extract_content_from_soup(soup, content_schema)
+    
+    def extract_content_from_soup(self, soup: BeautifulSoup, content_schema: Dict) -> Dict[str, Any]:
+        """
+        从已解析的文档中提取结构化内容
+        
+        不会修改传入的文档树，同一个soup可继续用于其他提取
+        
+        参数:
+            soup: parse() 返回的已解析文档
+            content_schema: 内容提取模式配置
+            
+        返回:
+            提取的结构化内容
+        """
         result = {}
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # 提取标题 - 支持新旧字段名
+            # 读取选择器 - 支持新旧字段名
             title_selector = content_schema.get("title", content_schema.get("title_selector", "h1"))
-            title_element = soup.select_one(title_selector)
+            author_selector = content_schema.get("author", content_schema.get("author_selector"))
+            date_selector = content_schema.get("date", content_schema.get("date_selector"))
+            content_selector = content_schema.get("content", content_schema.get("content_container_selector", "article"))
+            
+            # 一次遍历同时查找标题、作者、日期和主要内容
+            found = select_first(soup, [title_selector, author_selector, date_selector, content_selector])
+            
+            # 提取标题
+            title_element = found.get(title_selector)
             if title_element:
                 result["title"] = title_element.get_text().strip()
             else:
                 logger.warning(f"未找到标题元素: {title_selector}")
             
-            # 提取作者 - 支持新旧字段名
-            author_selector = content_schema.get("author", content_schema.get("author_selector"))
+            # 提取作者
             if author_selector:
-                author_element = soup.select_one(author_selector)
+                author_element = found.get(author_selector)
                 if author_element:
                     result["author"] = author_element.get_text().strip()
             
-            # 提取日期 - 支持新旧字段名
-            date_selector = content_schema.get("date", content_schema.get("date_selector"))
+            # 提取日期
             if date_selector:
-                date_element = soup.select_one(date_selector)
+                date_element = found.get(date_selector)
                 if date_element:
                     # 优先从日期属性中获取
                     date_attr = content_schema.get("date_attribute")
@@ -151,15 +329,15 @@ class Extractor:
                     else:
                         result["date"] = date_element.get_text().strip()
             
-            # 提取主要内容 - 支持新旧字段名
-            content_selector = content_schema.get("content", content_schema.get("content_container_selector", "article"))
-            content_element = soup.select_one(content_selector)
+            # 提取主要内容
+            content_element = found.get(content_selector)
             
             if not content_element:
                 logger.warning(f"未找到主要内容元素: {content_selector}")
-                # 尝试常见的内容容器选择器
-                for selector in ["article", "main", ".content", ".entry-content", ".post-content"]:
-                    content_element = soup.select_one(selector)
+                # 尝试常见的内容容器选择器 (一次遍历，按优先级取第一个找到的)
+                fallback = select_first(soup, CONTENT_FALLBACK_SELECTORS)
+                for selector in CONTENT_FALLBACK_SELECTORS:
+                    content_element = fallback.get(selector)
                     if content_element:
                         logger.info(f"使用备选选择器找到内容: {selector}")
                         break
@@ -168,15 +346,11 @@ class Extractor:
                 # 提取原始HTML
                 raw_html = str(content_element)
                 
-                # 移除不需要的元素
-                if "remove" in content_schema:
-                    remove_selectors = content_schema.get("remove", [])
-                    for selector in remove_selectors:
-                        for element in content_element.select(selector):
-                            element.decompose()
+                # 移除不需要的元素 (在副本上操作，保持共享的文档树不变)
+                content_element = remove_elements(content_element, content_schema.get("remove", []))
                 
-                # 转换为Markdown
-                markdown = markdownify.markdownify(str(content_element), heading_style="ATX")
+                # 转换为Markdown (直接遍历文档树，不再序列化后重新解析)
+                markdown = _MARKDOWN.convert_soup(content_element).strip('\n')
                 
                 result["raw_content"] = markdown
                 result["html_content"] = raw_html
@@ -187,7 +361,7 @@ class Extractor:
             if "custom_fields" in content_schema:
                 custom_fields = content_schema.get("custom_fields", {})
                 for field_name, selector in custom_fields.items():
-                    element = soup.select_one(selector)
+                    element = self._css(selector).select_one(soup)
                     if element:
                         if isinstance(selector, dict) and "attribute" in selector:
                             # 提取属性值
@@ -206,12 +380,8 @@ class Extractor:
     
     def clean_text(self, text: str) -> str:
         """清理文本，移除多余空白"""
-        if not text:
-            return ""
-        
         # 替换多个空白为单个空格
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return _WS_RE.sub(' ', text).strip() if text else ""
     
     def extract_metadata(self, soup: BeautifulSoup) -> Dict[str, str]:
         """提取页面元数据"""
@@ -222,23 +392,29 @@ class Extractor:
         if title:
             metadata['title'] = title.string.strip()
         
-        # 提取元标签
-        meta_tags = {
-            'description': ['description', 'og:description'],
-            'keywords': ['keywords'],
-            'author': ['author', 'og:author'],
-            'published_time': ['article:published_time', 'og:published_time', 'published_time'],
-            'modified_time': ['article:modified_time', 'og:modified_time', 'modified_time'],
-            'image': ['og:image', 'twitter:image']
-        }
+        # 一次遍历所有meta标签，记录每个名称第一次出现时的 name / property 标签
+        # (与逐个 soup.find 的结果一致)
+        by_name = {}
+        by_property = {}
+        primary_found = 0
+        for meta in soup.find_all('meta'):
+            name = meta.get('name')
+            if name in _META_NAMES and name not in by_name:
+                by_name[name] = meta
+                # 所有字段的首选名称都已通过 name 属性找到内容时，后面的标签不会再改变结果
+                if name in _META_PRIMARY_NAMES and meta.get('content', '').strip():
+                    primary_found += 1
+                    if primary_found == len(_META_PRIMARY_NAMES):
+                        break
+            prop = meta.get('property')
+            if prop in _META_NAMES and prop not in by_property:
+                by_property[prop] = meta
         
-        for key, meta_names in meta_tags.items():
+        # 按别名优先级取第一个有内容的值
+        for key, meta_names in _META_TAGS.items():
             for name in meta_names:
-                # 检查 name 属性
-                meta = soup.find('meta', attrs={'name': name})
-                if not meta:
-                    # 检查 property 属性
-                    meta = soup.find('meta', attrs={'property': name})
+                # 优先 name 属性，其次 property 属性
+                meta = by_name.get(name) or by_property.get(name)
                 
                 if meta and meta.has_attr('content') and meta['content'].strip():
                     metadata[key] = meta['content'].strip()
@@ -246,7 +422,7 @@ class Extractor:
         
         return metadata
     
-    def extract_custom_element(self, html_content, custom_schema):
+    def extract_custom_element(self, html_content: Union[str, BeautifulSoup], custom_schema):
         """从HTML中提取自定义元素"""
         logger.info("正在从HTML中提取自定义元素")
         results = []
@@ -260,7 +436,29 @@ class Extractor:
             return results
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = self._as_soup(html_content)
+        except Exception as e:
+            logger.error(f"提取自定义元素时出错: {e}")
+            return results
+        html_text = html_content if isinstance(html_content, str) else None
+        return self.extract_custom_element_from_soup(soup, custom_schema, html_text)
+    
+    def extract_custom_element_from_soup(self, soup: BeautifulSoup, custom_schema,
+                                         html_content: Optional[str] = None):
+        """
+        从已解析的文档中提取自定义元素
+        
+        优先使用CSS选择器；只提供XPath时使用lxml查找，lxml文档树在首次需要时才构建，
+        html_content 为原始HTML时可省去从soup重新序列化
+        """
+        results = []
+        lxml_tree = None
+        
+        if not custom_schema or not isinstance(custom_schema, dict):
+            logger.error("自定义Schema格式无效")
+            return results
+        
+        try:
             elements = custom_schema.get('elements', [])
             
             if not elements:
@@ -274,14 +472,41 @@ class Extractor:
                 css_selector = element_def.get('cssSelector')
                 xpath = element_def.get('xpath')
                 
-                # 只支持CSS选择器
+                # 没有CSS选择器时使用XPath
                 if not css_selector:
-                    logger.warning(f"元素 #{idx+1} 没有提供CSS选择器，跳过")
+                    if not xpath:
+                        logger.warning(f"元素 #{idx+1} 没有提供CSS选择器或XPath，跳过")
+                        continue
+                    
+                    try:
+                        import lxml.etree
+                        if lxml_tree is None:
+                            lxml_tree = lxml.etree.HTML(html_content if html_content else str(soup))
+                        found_elements = _compile_xpath(xpath)(lxml_tree)
+                        logger.info(f"XPath '{xpath}' 找到 {len(found_elements)} 个元素")
+                        
+                        for i, el in enumerate(found_elements):
+                            if isinstance(el, str):
+                                # 属性值或文本节点
+                                el_html = el_text = str(el)
+                            else:
+                                el_html = lxml.etree.tostring(el, encoding='unicode', method='html', with_tail=False)
+                                el_text = ''.join(el.itertext())
+                            results.append({
+                                'index': i,
+                                'html': el_html,
+                                'text': el_text,
+                                'selector': xpath
+                            })
+                    except ImportError:
+                        logger.warning("lxml库未安装，无法使用XPath选择器")
+                    except Exception as e:
+                        logger.error(f"XPath查找出错: {e}")
                     continue
                 
                 # 查找元素
                 try:
-                    found_elements = soup.select(css_selector)
+                    found_elements = self._css(css_selector).select(soup)
                     logger.info(f"CSS选择器 '{css_selector}' 找到 {len(found_elements)} 个元素")
                     
                     for i, el in enumerate(found_elements):
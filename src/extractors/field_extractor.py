@@ -6,6 +6,11 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# 常见日期格式: 2024-01-31、31/01/2024、31-Jan-2024
+_DATE_RE = re.compile(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{4}|\d{1,2}[-/]\w{3,9}[-/]\d{4}')
+# 连续空白
+_WS_RE = re.compile(r'\s+')
+
 class FieldExtractor:
     """
     从大范围元素中提取特定字段
@@ -94,7 +99,7 @@ class FieldExtractor:
             result['date'] = date_elements[0].get_text().strip()
         else:
             # 查找包含日期格式的文本
-            text_with_date = soup.find(string=re.compile(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{4}|\d{1,2}[-/]\w{3,9}[-/]\d{4}'))
+            text_with_date = soup.find(string=_DATE_RE)
             if text_with_date:
                 result['date'] = text_with_date.strip()
         
@@ -197,11 +202,10 @@ class FieldExtractor:
             return self._clean_date(date_elements[0].get_text().strip())
         
         # 查找包含日期格式的文本
-        date_pattern = r'\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{4}|\d{1,2}[-/]\w{3,9}[-/]\d{4}'
-        text_with_date = soup.find(string=re.compile(date_pattern))
+        text_with_date = soup.find(string=_DATE_RE)
         if text_with_date:
             # 提取日期部分
-            match = re.search(date_pattern, text_with_date)
+            match = _DATE_RE.search(text_with_date)
             if match:
                 return self._clean_date(match.group(0))
         
@@ -213,7 +217,7 @@ class FieldExtractor:
             return None
         
         # 去除多余空白和标点
-        date_text = re.sub(r'\s+', ' ', date_text).strip()
+        date_text = _WS_RE.sub(' ', date_text).strip()
         
         # 尝试解析常见日期格式
         date_formats = [
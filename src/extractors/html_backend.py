@@ -0,0 +1,145 @@
+import re
+import abc
+import copy
+import logging
+import functools
+from typing import Any, Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+import soupsieve
+
+# 配置日志
+logger = logging.getLogger("HtmlBackend")
+
+# 需要跳过的链接前缀: 锚点、JavaScript、邮件和电话链接
+SKIP_LINK_PREFIXES = ('#', 'javascript:', 'mailto:', 'tel:')
+
+# 找不到主要内容时依次尝试的常见内容容器
+CONTENT_FALLBACK_SELECTORS = ["article", "main", ".content", ".entry-content", ".post-content"]
+
+@functools.lru_cache(maxsize=256)
+def _compile_alternation(patterns: tuple) -> "re.Pattern":
+    """编译合并后的交替表达式并缓存，多个实例及多个页面之间共享"""
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+def combine_patterns(patterns: Iterable[str]) -> Optional["re.Pattern"]:
+    """将多个正则合并为一个交替表达式，没有模式时返回None"""
+    patterns = tuple(patterns or ())
+    if not patterns:
+        return None
+    return _compile_alternation(patterns)
+
+@functools.lru_cache(maxsize=1024)
+def compile_css(selector: str) -> soupsieve.SoupSieve:
+    """编译CSS选择器并缓存，同一schema的选择器在所有页面间只解析一次"""
+    return soupsieve.compile(selector)
+
+def select_first(root: Any, selectors: Iterable[Optional[str]]) -> dict:
+    """
+    一次遍历文档树，返回每个选择器的第一个匹配元素
+    
+    结果与对每个选择器分别调用 select_one 相同，空选择器和未匹配的选择器不在结果中
+    """
+    selectors = list(dict.fromkeys(s for s in selectors if s))
+    if len(selectors) == 1:
+        element = compile_css(selectors[0]).select_one(root)
+        return {selectors[0]: element} if element is not None else {}
+    
+    compiled = [(selector, compile_css(selector)) for selector in selectors]
+    found = {}
+    # 按文档顺序遍历任一选择器的匹配，归类到各自的选择器，全部找到后提前结束
+    for node in compile_css(', '.join(selectors)).iselect(root):
+        for selector, css in compiled:
+            if selector not in found and css.match(node):
+                found[selector] = node
+        if len(found) == len(compiled):
+            break
+    return found
+
+def remove_elements(element: Any, selectors: List[str]) -> Any:
+    """
+    返回移除了匹配元素后的元素
+    
+    在副本上移除，不修改共用的文档树；没有匹配到任何元素时直接返回原元素，无需复制
+    """
+    if not selectors:
+        return element
+    # 所有选择器合并为一个，一次遍历找出全部要移除的元素
+    remove_css = compile_css(', '.join(selectors))
+    if remove_css.select_one(element) is None:
+        return element
+    element = copy.copy(element)
+    for node in remove_css.select(element):
+        # 祖先元素已被移除时其后代也已销毁，跳过
+        if not node.decomposed:
+            node.decompose()
+    return element
+
+class HtmlBackend(abc.ABC):
+    """
+    HTML解析后端接口，提取器只通过这些方法访问文档树，
+    便于替换为更快的原生解析器
+    """
+    name = ""
+
+    @abc.abstractmethod
+    def parse(self, html_content: str) -> Any:
+        """解析HTML，返回文档树"""
+
+    @abc.abstractmethod
+    def select(self, node: Any, selector: str) -> List[Any]:
+        """返回节点下匹配CSS选择器的所有元素"""
+
+    @abc.abstractmethod
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        """元素的属性值，不存在时返回None"""
+
+class BS4Backend(HtmlBackend):
+    """BeautifulSoup后端 (默认)，选择器经soupsieve编译并缓存"""
+    name = "bs4"
+
+    def __init__(self, parser: str = 'lxml'):
+        self.parser = parser
+
+    def parse(self, html_content: str) -> BeautifulSoup:
+        return BeautifulSoup(html_content, self.parser)
+
+    def select(self, node, selector: str) -> List[Any]:
+        return compile_css(selector).select(node)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+class SelectolaxBackend(HtmlBackend):
+    """selectolax (lexbor引擎) 后端，解析和选择都在C中完成，需要安装selectolax"""
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser_class = LexborHTMLParser
+
+    def parse(self, html_content: str):
+        return self._parser_class(html_content)
+
+    def select(self, node, selector: str) -> List[Any]:
+        return node.css(selector)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+def get_backend(name: str = "bs4", parser: str = 'lxml') -> HtmlBackend:
+    """
+    按名称创建解析后端
+
+    参数:
+        name: "bs4" 或 "selectolax"，selectolax未安装或名称未知时回退到bs4
+        parser: bs4后端使用的解析器
+    """
+    if name == SelectolaxBackend.name:
+        try:
+            return SelectolaxBackend()
+        except ImportError:
+            logger.warning("selectolax未安装，使用BeautifulSoup解析")
+    elif name != BS4Backend.name:
+        logger.warning(f"未知的HTML解析后端: {name}，使用BeautifulSoup解析")
+    return BS4Backend(parser)
@@ -1,18 +1,56 @@
 import logging
 from typing import Dict, List, Any, Optional
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit, parse_qsl
 from playwright.async_api import Page, ElementHandle
 
 from src.extractors.xpath_processor import XPathProcessor
+from src.extractors.html_backend import SKIP_LINK_PREFIXES
 
 logger = logging.getLogger(__name__)
 
+# 在浏览器中一次取出所有匹配元素的 [href属性, 文本]，避免对每个元素分别调用
+# get_attribute 和 text_content 产生两次往返
+LINK_DATA_JS = "els => els.map(e => [e.getAttribute('href'), e.textContent])"
+
+# 同上，但在浏览器中完成过滤和整理: 跳过没有href的元素，链接由浏览器解析为绝对URL
+# (按页面的 <base> 解析，SVG等没有字符串href属性的元素保留原值)，文本去掉首尾空白
+RESOLVED_LINK_DATA_JS = """els => els.flatMap(e => {
+    const href = e.getAttribute('href');
+    if (!href) return [];
+    return [[typeof e.href === 'string' ? e.href : href, (e.textContent || '').trim()]];
+})"""
+
+def resolved_link_items(link_data: List[List[str]], base_url: str) -> List[Dict[str, str]]:
+    """将 RESOLVED_LINK_DATA_JS 的结果转换为链接项，只有浏览器未解析的相对链接才需要urljoin"""
+    return [
+        {'href': href if href.startswith(('http://', 'https://')) else urljoin(base_url, href), 'text': text}
+        for href, text in link_data
+    ]
+
+def canonical_url_key(url: str) -> tuple:
+    """
+    URL的规范化键，用于识别只在片段、末尾斜杠、查询参数顺序或域名大小写上不同的重复链接
+    """
+    parts = urlsplit(url)
+    return (parts.netloc.lower(), parts.path.rstrip('/'), tuple(sorted(parse_qsl(parts.query, keep_blank_values=True))))
+
+def dedupe_link_items(items: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """按规范化URL去除重复的链接项，保留第一次出现的项和原有顺序"""
+    seen = set()
+    unique_items = []
+    for item in items:
+        key = canonical_url_key(item['href'])
+        if key not in seen:
+            seen.add(key)
+            unique_items.append(item)
+    return unique_items
+
 class WorkflowLinksExtractor:
     """工作流链接提取器，用于从页面中提取链接"""
     
     @staticmethod
-    async def extract_links(page: Page, selector: str, should_generalize: bool = False) -> List[Dict[str, str]]:
+    async def extract_links(page: Page, selector: str, should_generalize: bool = False,
+                            prefer_js_extraction: bool = False) -> List[Dict[str, str]]:
         """
         从页面中提取链接
         
@@ -20,6 +58,7 @@ class WorkflowLinksExtractor:
             page: Playwright页面对象
             selector: 选择器(CSS或XPath)
             should_generalize: 是否需要泛化
+            prefer_js_extraction: 跳过选择器匹配，直接在浏览器中取出整页链接
             
         返回:
             链接项列表，每项包含 href 和 text
@@ -28,6 +67,12 @@ class WorkflowLinksExtractor:
             base_url = page.url
             items = []
             
+            if prefer_js_extraction:
+                logger.info("直接提取整页链接")
+                items = dedupe_link_items(await WorkflowLinksExtractor.extract_page_links(page, base_url))
+                logger.info(f"提取到 {len(items)} 个链接")
+                return items
+            
             logger.info(f"使用选择器提取链接: {selector}")
             
             # 处理XPath选择器
@@ -90,28 +135,15 @@ class WorkflowLinksExtractor:
                 # 使用原始的CSS选择器处理
                 css_selector = selector
                 logger.info(f"处理CSS选择器: {css_selector}")
-                elements = await page.query_selector_all(css_selector)
-                
-                for element in elements:
-                    # 获取href属性
-                    href = await element.get_attribute('href')
-                    text = await element.text_content()
-                    
-                    if href:
-                        # 构建完整URL
-                        full_url = urljoin(base_url, href)
-                        items.append({
-                            'href': full_url,
-                            'text': text.strip() if text else ''
-                        })
+                link_data = await page.eval_on_selector_all(css_selector, RESOLVED_LINK_DATA_JS)
+                items = resolved_link_items(link_data, base_url)
             
             # 如果还没有找到链接，尝试全页面搜索
             if not items and should_generalize:
                 logger.info("未找到链接，尝试全页面搜索...")
-                html_content = await page.content()
-                additional_items = await WorkflowLinksExtractor.extract_links_from_html(html_content, base_url)
-                items.extend(additional_items)
+                items.extend(await WorkflowLinksExtractor.extract_page_links(page, base_url))
             
+            items = dedupe_link_items(items)
             logger.info(f"提取到 {len(items)} 个链接")
             return items
             
@@ -120,40 +152,20 @@ class WorkflowLinksExtractor:
             return []
     
     @staticmethod
-    def _is_valid_link(href: str) -> bool:
-        """检查是否是有效的链接"""
-        if not href:
-            return False
-        
-        # 排除常见的无效链接
-        invalid_prefixes = ['javascript:', '#', 'mailto:', 'tel:']
-        for prefix in invalid_prefixes:
-            if href.startswith(prefix):
-                return False
-        
-        return True
+    async def extract_page_links(page: Page, base_url: str) -> List[Dict[str, str]]:
+        """直接在浏览器中取出页面上的所有有效链接，不传输和重新解析整页HTML"""
+        items = []
+        link_data = await page.eval_on_selector_all('a[href]', LINK_DATA_JS)
+        for href, text in link_data:
+            if WorkflowLinksExtractor._is_valid_link(href):
+                items.append({
+                    'href': urljoin(base_url, href),
+                    'text': text.strip() if text else ''
+                })
+        return items
     
     @staticmethod
-    async def extract_links_from_html(html_content: str, base_url: str) -> List[Dict[str, str]]:
-        """从HTML内容中提取链接"""
-        try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            items = []
-            
-            links = soup.find_all('a', href=True)
-            for link in links:
-                href = link.get('href')
-                
-                if WorkflowLinksExtractor._is_valid_link(href):
-                    # 构建完整URL
-                    full_url = urljoin(base_url, href)
-                    items.append({
-                        'href': full_url,
-                        'text': link.get_text().strip()
-                    })
-            
-            return items
-            
-        except Exception as e:
-            logger.error(f"从HTML内容提取链接时出错: {str(e)}")
-            return [] 
\ No newline at end of file
+    def _is_valid_link(href: str) -> bool:
+        """检查是否是有效的链接"""
+        # 排除空链接和常见的无效链接
+        return bool(href) and not href.startswith(SKIP_LINK_PREFIXES)
@@ -6,6 +6,35 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# 提取元素的href、文本和嵌套选择器字段:
+# "child:n" 取第n个子节点的文本，其他选择器取第一个匹配子元素的文本(url/href字段取href属性)
+_ELEMENT_DATA_JS = """(els, nested) => els.map(e => {
+    const item = {};
+    const href = e.getAttribute('href');
+    if (href) item.href = href;
+    const text = e.textContent;
+    if (text) item.text = text.trim();
+    for (const [field, selector] of Object.entries(nested)) {
+        try {
+            let value = null;
+            if (selector.startsWith('child:')) {
+                const child = e.childNodes[parseInt(selector.slice(6), 10)];
+                value = child ? child.textContent : null;
+            } else {
+                const child = e.querySelector(selector);
+                if (child) {
+                    value = (field === 'url' || field === 'href') ? child.getAttribute('href') : child.textContent;
+                }
+            }
+            if (value) item[field] = value.trim();
+        } catch (err) {}
+    }
+    return item;
+})"""
+
+# 常见日期格式: 2024-01-31、31/01/2024、31-Jan-2024
+_DATE_RE = re.compile(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{4}|\d{1,2}[-/]\w{3,9}[-/]\d{4}')
+
 class XPathProcessor:
     """
     增强对XPath选择器的处理能力
@@ -32,57 +61,18 @@ class XPathProcessor:
             
             logger.info(f"使用XPath提取元素: {clean_xpath}")
             
-            # 使用Playwright的locator API
+            # 使用Playwright的locator API，在浏览器中一次取出所有元素的数据，
+            # 不再对每个元素和每个嵌套选择器分别往返
             locator = page.locator(f"xpath={clean_xpath}")
-            elements = await locator.all()
+            element_data = await locator.evaluate_all(_ELEMENT_DATA_JS, nested_selectors or {})
             
-            logger.info(f"找到 {len(elements)} 个匹配的元素")
+            logger.info(f"找到 {len(element_data)} 个匹配的元素")
             
             results = []
-            for element in elements:
-                item = {}
-                
-                # 提取href属性(如果元素是链接)
-                href = await element.get_attribute('href')
-                if href:
-                    item['href'] = href
-                
-                # 提取文本内容
-                text = await element.text_content()
-                if text:
-                    item['text'] = text.strip()
-                
-                # 处理嵌套选择器
-                if nested_selectors:
-                    for field, selector in nested_selectors.items():
-                        try:
-                            # 处理特殊的child:n选择器
-                            if selector.startswith('child:'):
-                                try:
-                                    index = int(selector.split(':')[1])
-                                    # 使用evaluate在浏览器中执行JS以获取第n个子元素
-                                    child_element = await element.evaluate(f"node => node.childNodes[{index}]")
-                                    if child_element:
-                                        item[field] = child_element.textContent.strip()
-                                except (IndexError, ValueError) as e:
-                                    logger.debug(f"处理child选择器时出错: {e}")
-                            # 处理常规选择器
-                            else:
-                                child_element = await element.query_selector(selector)
-                                if child_element:
-                                    if field == 'url' or field == 'href':
-                                        value = await child_element.get_attribute('href')
-                                    else:
-                                        value = await child_element.text_content()
-                                    
-                                    if value:
-                                        item[field] = value.strip()
-                        except Exception as e:
-                            logger.debug(f"处理嵌套选择器 '{field}: {selector}' 时出错: {e}")
-                
+            for index, item in enumerate(element_data):
                 # 如果没有提取到有效数据，尝试使用特殊的列表项处理
                 if not item or all(not v for v in item.values()):
-                    processed_item = await XPathProcessor.process_list_item(element)
+                    processed_item = await XPathProcessor.process_list_item(locator.nth(index))
                     if processed_item:
                         item.update(processed_item)
                 
@@ -154,10 +144,9 @@ class XPathProcessor:
             result['date'] = date_elements[0].get_text().strip()
         else:
             # 查找包含日期格式的文本
-            date_pattern = r'\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{4}|\d{1,2}[-/]\w{3,9}[-/]\d{4}'
             for tag in soup.find_all(['div', 'span', 'p']):
                 text = tag.get_text()
-                match = re.search(date_pattern, text)
+                match = _DATE_RE.search(text)
                 if match:
                     result['date'] = match.group(0)
                     break
@@ -0,0 +1,44 @@
+"""
+配置加载 - 读取YAML/JSON工作流和提取模式文件并缓存解析结果
+"""
+import os
+import copy
+import json
+import logging
+import functools
+from typing import Any, Tuple
+
+import yaml
+
+logger = logging.getLogger("ConfigLoader")
+
+# 优先使用libyaml的C实现，未安装时回退到纯Python实现
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def _file_key(path: str) -> Tuple[str, int, int]:
+    """文件的缓存键: 绝对路径、修改时间和大小，文件被修改后自动失效"""
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+@functools.lru_cache(maxsize=64)
+def _load_cached(path: str, mtime_ns: int, size: int) -> Any:
+    """解析文件，同一版本的文件只解析一次"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+        return yaml.load(f, Loader=_YamlLoader)
+
+def load_config_file(path: str) -> Any:
+    """
+    加载YAML或JSON配置文件
+
+    解析结果按 (路径, 修改时间, 大小) 缓存，重复加载同一文件时无需重新解析；
+    返回的是副本，调用方可以放心修改
+
+    参数:
+        path: 文件路径，.json 按JSON解析，其他按YAML解析
+
+    返回:
+        解析后的数据
+    """
+    return copy.deepcopy(_load_cached(*_file_key(path)))
@@ -10,16 +10,21 @@ from bs4 import BeautifulSoup
 import lxml.etree
 import lxml.html
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+from src.utils.log_queue import add_file_log
+
 logger = logging.getLogger("ElementGeneralizer")
 
+# 预编译的正则，避免每次泛化时重新编译
+_XPATH_STEP_RE = re.compile(r'([^[]+)(\[\d+\])?')           # XPath步骤及其索引，如 div[2]
+_XPATH_ID_RE = re.compile(r'@id=[\'"]([^\'"]+)[\'"]')      # XPath中的id条件
+_NUMBERED_ID_RE = re.compile(r'(.+?)[-_](\d+)$')           # 带序号的id，如 item-1
+_CSS_ATTR_RE = re.compile(r'\[([^\]]+)\]')                 # CSS属性选择器
+_CSS_COMBINATOR_RE = re.compile(r'\s+>\s+|\s+')            # CSS子代/后代组合符
+_CSS_PSEUDO_RE = re.compile(r':([\w-]+)')                  # CSS伪类和伪元素
+
+# 复用同一个lxml HTML解析器，不必每次解析都重新创建解析器和libxml2的解析上下文
+_HTML_PARSER = lxml.etree.HTMLParser()
+
 class ElementGeneralizer:
     """从单个元素样例推断通用选择器的工具"""
     
@@ -35,11 +40,8 @@ class ElementGeneralizer:
         if not os.path.exists(self.logs_dir):
             os.makedirs(self.logs_dir)
             
-        # 配置文件日志处理器
-        log_path = os.path.join(self.logs_dir, "element_generalizer.log")
-        file_handler = logging.FileHandler(log_path, encoding='utf-8')
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        logger.addHandler(file_handler)
+        # 配置文件日志，在后台线程中写入，多个实例共用同一个处理器
+        add_file_log(logger, os.path.join(self.logs_dir, "element_generalizer.log"))
         
         logger.info("初始化元素泛化器")
     
@@ -101,8 +103,7 @@ class ElementGeneralizer:
         
         try:
             # 解析HTML
-            parser = lxml.etree.HTMLParser()
-            dom = lxml.etree.fromstring(html_content, parser)
+            dom = lxml.etree.fromstring(html_content, _HTML_PARSER)
             
             # 检查原始XPath是否有效
             original_elements = dom.xpath(xpath)
@@ -168,7 +169,7 @@ class ElementGeneralizer:
                     for part in relative_parts:
                         if part:
                             # 移除索引
-                            index_match = re.match(r'([^[]+)(\[\d+\])?', part)
+                            index_match = _XPATH_STEP_RE.match(part)
                             if index_match:
                                 cleaned_parts.append(index_match.group(1))
                             else:
@@ -184,12 +185,11 @@ class ElementGeneralizer:
                         })
             
             # 4. 处理包含id的情况，查找类似的元素
-            id_pattern = re.compile(r'@id=[\'"]([^\'"]+)[\'"]')
-            id_match = id_pattern.search(xpath)
+            id_match = _XPATH_ID_RE.search(xpath)
             if id_match:
                 id_value = id_match.group(1)
                 # 查找id的模式，例如item-1, item-2
-                match = re.match(r'(.+?)[-_](\d+)$', id_value)
+                match = _NUMBERED_ID_RE.match(id_value)
                 if match:
                     prefix = match.group(1)
                     gen_xpath = f"//*[starts-with(@id, '{prefix}')]"
@@ -302,8 +302,7 @@ class ElementGeneralizer:
                     })
             
             # 2. 尝试提取属性选择器部分并泛化
-            attr_pattern = re.compile(r'\[([^\]]+)\]')
-            attr_matches = attr_pattern.findall(css_selector)
+            attr_matches = _CSS_ATTR_RE.findall(css_selector)
             if attr_matches:
                 for attr_expr in attr_matches:
                     # 处理id属性
@@ -314,8 +313,7 @@ class ElementGeneralizer:
                             attr_value = parts[1].strip('"\'')
                             
                             # 检查是否是模式化的ID，如item-1, item-2等
-                            id_pattern = re.compile(r'(.+?)[-_](\d+)$')
-                            id_match = id_pattern.match(attr_value)
+                            id_match = _NUMBERED_ID_RE.match(attr_value)
                             if id_match:
                                 prefix = id_match.group(1)
                                 gen_selector = f"[{attr_name}^=\"{prefix}\"]"
@@ -329,7 +327,7 @@ class ElementGeneralizer:
             
             # 3. 处理嵌套选择器，尝试提取关键部分
             if ' > ' in css_selector or ' ' in css_selector:
-                parts = re.split(r'\s+>\s+|\s+', css_selector)
+                parts = _CSS_COMBINATOR_RE.split(css_selector)
                 if parts:
                     # 试图保留最后一个有意义的部分
                     last_part = parts[-1]
@@ -346,11 +344,10 @@ class ElementGeneralizer:
                             })
             
             # 4. 处理伪类和伪元素
-            pseudo_pattern = re.compile(r':([\w-]+)')
-            pseudo_matches = pseudo_pattern.findall(css_selector)
+            pseudo_matches = _CSS_PSEUDO_RE.findall(css_selector)
             if pseudo_matches:
                 # 移除所有伪类和伪元素
-                clean_selector = pseudo_pattern.sub('', css_selector)
+                clean_selector = _CSS_PSEUDO_RE.sub('', css_selector)
                 if clean_selector != css_selector:
                     elements = soup.select(clean_selector)
                     if elements and len(elements) > 1:
@@ -408,8 +405,7 @@ class ElementGeneralizer:
             
             # 解析HTML
             if is_xpath:
-                parser = lxml.etree.HTMLParser()
-                dom = lxml.etree.fromstring(html_content, parser)
+                dom = lxml.etree.fromstring(html_content, _HTML_PARSER)
                 elements = dom.xpath(selector)
                 
                 if not elements:
@@ -0,0 +1,31 @@
+"""
+事件循环 - 安装了uvloop时使用基于libuv的事件循环
+
+工作流的耗时主要在大量细小的await上 (Playwright的每次API调用、aiohttp请求)，
+uvloop降低了每次回调的调度开销
+"""
+import sys
+import asyncio
+import logging
+
+logger = logging.getLogger("EventLoop")
+
+def install_event_loop_policy() -> bool:
+    """
+    安装了uvloop时使用uvloop事件循环；未安装或在Windows上时使用默认事件循环
+
+    需要在 asyncio.run() 之前调用
+
+    返回:
+        是否启用了uvloop
+    """
+    if sys.platform == 'win32':
+        return False
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    if not isinstance(asyncio.get_event_loop_policy(), uvloop.EventLoopPolicy):
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.debug("已启用uvloop事件循环")
+    return True
@@ -35,9 +35,14 @@ async def extract_links_enhanced(self, action: Dict) -> Dict[str, Any]:
             selector = element_config.get('sample', '')
         
         should_generalize = element_config.get('generalize', False)
+        prefer_js_extraction = element_config.get('prefer_js_extraction', False)
+        
+        # 页面只等到DOMContentLoaded，先等待链接元素出现
+        if selector and not prefer_js_extraction:
+            await self._wait_for_element(selector)
         
         # 使用WorkflowLinksExtractor提取链接
-        items = await WorkflowLinksExtractor.extract_links(self.page, selector, should_generalize)
+        items = await WorkflowLinksExtractor.extract_links(self.page, selector, should_generalize, prefer_js_extraction)
         
         # 保存提取的URLs
         output_name = action.get('output')
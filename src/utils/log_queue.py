@@ -0,0 +1,54 @@
+"""
+后台日志 - 日志处理器在独立线程中写终端和文件，记录日志的事件循环线程不等待IO
+"""
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# 已添加的文件日志 (logger名称, 文件绝对路径)
+_file_logs = set()
+
+def queued_handler(*handlers: logging.Handler) -> QueueHandler:
+    """
+    在后台线程中运行给定的日志处理器
+
+    返回的处理器只把日志记录放入队列，由监听线程交给各处理器格式化并写出；
+    程序退出时自动停止监听线程并写完队列中剩余的记录
+
+    参数:
+        handlers: 实际输出日志的处理器，未设置格式的使用 LOG_FORMAT
+
+    返回:
+        添加到logger上的队列处理器
+    """
+    for handler in handlers:
+        if handler.formatter is None:
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    queue_handler = QueueHandler(log_queue)
+    # 入队前只生成消息文本，完整格式由后台处理器生成 (也避免 basicConfig 给它设置格式后重复格式化)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    return queue_handler
+
+def add_file_log(logger: logging.Logger, path: str):
+    """
+    为logger添加后台写入的文件日志，同一logger的同一文件只添加一次
+
+    参数:
+        logger: 日志记录器
+        path: 日志文件路径
+    """
+    key = (logger.name, os.path.abspath(path))
+    if key in _file_logs:
+        return
+    _file_logs.add(key)
+    logger.addHandler(queued_handler(logging.FileHandler(path, encoding='utf-8')))
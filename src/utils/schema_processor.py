@@ -2,13 +2,18 @@
 通用Schema处理器，支持多种不同格式的Schema配置
 可以处理不同结构的Schema，用于从HTML中提取数据
 """
+import io
 import json
 import logging
-from typing import Dict, List, Any, Optional, Union
+import functools
+from typing import Dict, List, Any, Iterable, Optional, Union
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, Tag
 import re
-import markdownify
+
+from src.extractors.html_backend import (HtmlBackend, BS4Backend, compile_css, get_backend, combine_patterns,
+                                         select_first, remove_elements,
+                                         SKIP_LINK_PREFIXES, CONTENT_FALLBACK_SELECTORS)
 
 # 配置日志
 logging.basicConfig(
@@ -21,25 +26,195 @@ logging.basicConfig(
 )
 logger = logging.getLogger("SchemaProcessor")
 
+def _select_parser() -> str:
+    """优先使用C实现的lxml解析器，未安装时回退到纯Python的html.parser"""
+    try:
+        BeautifulSoup("", 'lxml')
+        return 'lxml'
+    except FeatureNotFound:
+        logger.warning("lxml未安装，使用html.parser解析HTML")
+        return 'html.parser'
+
+# BeautifulSoup使用的解析器
+_PARSER = _select_parser()
+
+# lxml只在模块加载时导入一次，XPath和增量解析时不再每次导入；未安装时为None
+try:
+    import lxml.etree as _etree
+    # XPath使用的解析器，所有页面复用同一个实例；去掉注释和处理指令，文档树更小
+    _XPATH_PARSER = _etree.HTMLParser(remove_comments=True, remove_pis=True)
+except ImportError:
+    _etree = None
+
+# 复用配置好的Markdown转换器，不必每次转换都重新创建和解析选项；
+# markdownify在首次转换时才导入，只提取URL时不加载
+_converters = {}
+
+def _converter(atx: bool):
+    """获取Markdown转换器，atx为True时标题使用 # 风格，否则使用markdownify的默认风格"""
+    converter = _converters.get(atx)
+    if converter is None:
+        import markdownify
+        options = {"heading_style": "ATX"} if atx else {}
+        converter = _converters[atx] = markdownify.MarkdownConverter(**options)
+    return converter
+
+def _to_markdown(html_content: str, atx: bool = True) -> str:
+    """
+    将HTML转换为Markdown
+
+    参数:
+        html_content: HTML内容
+        atx: 标题是否使用 # 风格，否则使用markdownify的默认风格
+    """
+    return _converter(atx).convert(html_content)
+
+def _element_to_markdown(element: Tag, atx: bool = True) -> str:
+    """
+    直接转换已解析的BeautifulSoup元素，无需先序列化为HTML再重新解析；
+    与转换整个文档时一样去掉首尾的分隔换行，结果与 _to_markdown(str(element)) 相同
+    """
+    return _converter(atx).convert_soup(element).strip('\n')
+
+@functools.lru_cache(maxsize=4096)
+def _join_url(base_url: str, url: str) -> str:
+    """urljoin并缓存，导航栏、侧边栏等在各页面重复出现的链接只需解析一次"""
+    return urljoin(base_url, url)
+
+# 以下辅助函数同时处理BeautifulSoup元素和XPath返回的lxml元素，
+# XPath结果直接以lxml元素参与后续提取，无需序列化后再用BeautifulSoup重新解析
+
+# 各格式的提取方法在结果中记录已转换为Markdown的元素，extract_content 取出后删除
+_CONVERTED_KEY = '_converted_element'
+
+# 传统格式schema的特征字段
+_LEGACY_KEYS = frozenset(('container', 'link_selector', 'attribute', 'content', 'title', 'author', 'date'))
+
+# 通用提取方法的候选选择器 (按优先级排列)
+_GENERIC_TITLE_SELECTORS = ['h1', 'header h1', '.entry-title', '.post-title', 'article h1', '.headline', 'title']
+_GENERIC_CONTENT_SELECTORS = [
+    'article', 'main article', '.post-content', '.article-content',
+    '.entry-content', '#content', 'main .content', 'div[itemprop="articleBody"]',
+    '.blog-post', '.blog-entry', 'main', 'section'
+]
+_GENERIC_DATE_SELECTORS = ['time', '[itemprop="datePublished"]', '.published', '.post-date',
+                           'meta[property="article:published_time"]']
+_GENERIC_AUTHOR_SELECTORS = ['[itemprop="author"]', '.author', '.byline', '[rel="author"]', 'meta[name="author"]']
+_GENERIC_SELECTORS = (_GENERIC_TITLE_SELECTORS + _GENERIC_CONTENT_SELECTORS
+                      + _GENERIC_DATE_SELECTORS + _GENERIC_AUTHOR_SELECTORS)
+
+def _first_by_priority(found: Dict[str, Any], selectors: List[str]) -> Optional[Any]:
+    """按选择器优先级返回 select_first 结果中的第一个元素，都未匹配时返回None"""
+    for selector in selectors:
+        element = found.get(selector)
+        if element is not None:
+            return element
+    return None
+
+def _stream_link_values(html_content: str, attribute: str) -> Optional[List[str]]:
+    """
+    使用lxml的增量解析读取所有a标签的属性值，每个元素处理完后立即清空并删除之前的兄弟元素，
+    不构建完整的文档树，内存占用不随文档大小增长；lxml未安装或解析失败时返回None
+    """
+    if _etree is None:
+        return None
+    
+    values = []
+    try:
+        for _, element in _etree.iterparse(io.BytesIO(html_content.encode('utf-8')), events=('end',),
+                                           html=True, recover=True, encoding='utf-8'):
+            if element.tag == 'a':
+                value = element.get(attribute)
+                if value:
+                    values.append(value)
+            # 结束事件时子元素都已处理过，清空元素并删除已处理的兄弟元素
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+    except Exception as e:
+        logger.debug("增量解析链接失败: %s", e)
+        return None
+    return values
+
+def _node_select(node: Any, selector: str) -> List[Any]:
+    """返回元素下匹配CSS选择器的所有子元素"""
+    if isinstance(node, Tag):
+        return compile_css(selector).select(node)
+    try:
+        return node.cssselect(selector)
+    except ImportError:
+        # 未安装cssselect时，只将该元素转换为BeautifulSoup
+        return compile_css(selector).select(BeautifulSoup(_node_html(node), _PARSER))
+
+def _node_text(node: Any) -> str:
+    """元素的文本内容"""
+    if isinstance(node, Tag):
+        return node.get_text()
+    return "".join(node.itertext())
+
+def _node_html(node: Any) -> str:
+    """元素的HTML"""
+    if isinstance(node, Tag):
+        return str(node)
+    return _etree.tostring(node, encoding='unicode', method='html')
+
+def _node_hrefs(node: Any) -> List[str]:
+    """元素内所有a标签的href"""
+    if isinstance(node, Tag):
+        return [link['href'] for link in node.find_all('a', href=True)]
+    return node.xpath('.//a/@href')
+
 class SchemaProcessor:
     """通用Schema处理器，可以处理多种不同格式的schema配置"""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, backend: str = 'bs4'):
         """
         初始化Schema处理器
         
         参数:
             base_url: 基础URL，用于将相对URL转换为绝对URL
+            backend: 传统格式schema提取URL时使用的解析后端，"bs4"(默认)或"selectolax"；
+                     其他格式和内容提取始终使用BeautifulSoup
         """
         self.base_url = base_url
-        logger.info(f"初始化SchemaProcessor，基础URL: {base_url}")
+        self._backend = get_backend(backend, _PARSER)
+        # 处理BeautifulSoup文档树的后端
+        self._soup_backend = self._backend if isinstance(self._backend, BS4Backend) else BS4Backend(_PARSER)
+        # 最近一次解析的HTML及其文档树，同一页面先后提取URL和内容时只解析一次
+        self._last_html = None
+        self._last_soup = None
+        # 已解析的URL提取规则: id(schema) -> (schema, 规则)，同一schema在所有页面间只解析一次
+        self._url_rules_cache = {}
+        logger.info("初始化SchemaProcessor，基础URL: %s", base_url)
+    
+    def parse(self, html_content: str) -> BeautifulSoup:
+        """
+        解析HTML
+        
+        同一页面解析一次后，可将结果传给 extract_urls 和 extract_content 共用；
+        对同一HTML字符串重复调用时直接返回缓存的文档树
+        """
+        if html_content is self._last_html and self._last_soup is not None:
+            return self._last_soup
+        soup = BeautifulSoup(html_content, _PARSER)
+        self._last_html = html_content
+        self._last_soup = soup
+        return soup
     
-    def extract_urls(self, html_content: str, schema: Dict) -> List[str]:
+    def _as_soup(self, html_content: Union[str, BeautifulSoup]) -> BeautifulSoup:
+        """已解析的文档直接返回，HTML字符串经 parse() 解析"""
+        if isinstance(html_content, BeautifulSoup):
+            return html_content
+        return self.parse(html_content)
+    
+    def extract_urls(self, html_content: Union[str, BeautifulSoup], schema: Dict) -> List[str]:
         """
         从HTML内容中提取URLs
         
         参数:
-            html_content: HTML内容
+            html_content: HTML内容，或 parse() 返回的已解析文档
             schema: Schema配置，支持多种格式
             
         返回:
@@ -53,35 +228,41 @@ class SchemaProcessor:
         logger.info("开始从HTML提取URLs")
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
             # 检测schema格式类型
             if self._is_legacy_format(schema):
-                # 传统格式 (extractor.py兼容格式)
+                # 传统格式 (extractor.py兼容格式)，只需CSS选择和读取属性，可使用更快的解析后端
                 logger.info("检测到传统格式Schema")
-                urls = self._extract_urls_legacy_format(soup, schema)
+                if isinstance(html_content, BeautifulSoup):
+                    urls = self._extract_urls_legacy_format(html_content, schema, self._soup_backend)
+                elif html_content is self._last_html and self._last_soup is not None:
+                    # 该页面已被完整解析过，直接复用
+                    urls = self._extract_urls_legacy_format(self._last_soup, schema, self._soup_backend)
+                else:
+                    urls = self._extract_urls_legacy_from_html(html_content, schema)
             elif self._is_selectors_format(schema):
                 # 新的选择器格式
                 logger.info("检测到选择器格式Schema")
-                urls = self._extract_urls_selectors_format(soup, schema)
+                urls = self._extract_urls_selectors_format(self._as_soup(html_content), schema)
             else:
                 # 尝试通用方法
                 logger.info("未检测到特定格式，尝试通用提取方法")
-                urls = self._extract_urls_generic(soup, schema)
+                urls = self._extract_urls_generic(self._as_soup(html_content), schema)
             
-            logger.info(f"提取到 {len(urls)} 个URL")
+            logger.info("提取到 %d 个URL", len(urls))
             return list(urls)
             
         except Exception as e:
-            logger.error(f"提取URL时出错: {e}", exc_info=True)
+            logger.error("提取URL时出错: %s", e, exc_info=True)
             return []
     
-    def extract_content(self, html_content: str, schema: Dict) -> Dict[str, Any]:
+    def extract_content(self, html_content: Union[str, BeautifulSoup], schema: Dict) -> Dict[str, Any]:
         """
         从HTML内容中提取结构化内容
         
+        不会修改文档树，同一个文档可继续用于 extract_urls
+        
         参数:
-            html_content: HTML内容
+            html_content: HTML内容，或 parse() 返回的已解析文档
             schema: 内容提取Schema配置
             
         返回:
@@ -94,7 +275,7 @@ class SchemaProcessor:
         result = {}
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = self._as_soup(html_content)
             
             # 检测schema格式类型
             if self._is_legacy_format(schema):
@@ -109,13 +290,14 @@ class SchemaProcessor:
                 # 尝试通用方法
                 logger.info("未检测到特定格式，尝试通用提取方法")
                 result = self._extract_content_generic(soup, schema)
+            converted = result.pop(_CONVERTED_KEY, None)
             
-            # 确保content_markdown字段存在
-            if 'content' in result and 'content_markdown' not in result:
-                result['content_markdown'] = result['content']
-                
-            if 'html_content' in result and 'content_markdown' not in result:
-                result['content_markdown'] = markdownify.markdownify(result['html_content'])
+            # 确保content_markdown字段存在 (各格式的提取方法已转换过时不再重复转换)
+            if 'content_markdown' not in result:
+                if 'content' in result:
+                    result['content_markdown'] = result['content']
+                elif 'html_content' in result:
+                    result['content_markdown'] = _to_markdown(result['html_content'], atx=False)
             
             # 确保至少有一些内容
             if not result.get('content_markdown'):
@@ -123,7 +305,9 @@ class SchemaProcessor:
                 logger.warning("未能提取到结构化内容，尝试使用整个页面内容")
                 main_content = soup.find('main') or soup.find('article') or soup.find('body')
                 if main_content:
-                    result['content_markdown'] = markdownify.markdownify(str(main_content))
+                    # 与已转换过的元素相同时，转换结果同样为空，无需再次转换
+                    if main_content is not converted:
+                        result['content_markdown'] = _element_to_markdown(main_content, atx=False)
                     result['title'] = soup.title.text if soup.title else "未知标题"
             
             # 基本的URL过滤
@@ -133,91 +317,160 @@ class SchemaProcessor:
             return result
             
         except Exception as e:
-            logger.error(f"提取内容时出错: {e}", exc_info=True)
+            logger.error("提取内容时出错: %s", e, exc_info=True)
             return {}
     
     def _is_legacy_format(self, schema: Dict) -> bool:
         """检查是否为传统格式的schema"""
         # 传统格式通常具有container, link_selector, attribute等关键字段
-        legacy_keys = ['container', 'link_selector', 'attribute', 'content', 'title', 'author', 'date']
         # 如果只是一个content格式，可能在content键的内部有传统格式
         if 'content' in schema and isinstance(schema['content'], dict):
             schema_to_check = schema['content']
         else:
             schema_to_check = schema
             
-        return any(key in schema_to_check for key in legacy_keys)
+        return not _LEGACY_KEYS.isdisjoint(schema_to_check)
     
     def _is_selectors_format(self, schema: Dict) -> bool:
         """检查是否为新的选择器格式schema"""
         # 新的选择器格式通常有selectors字段，包含元素和选择器定义
         return 'selectors' in schema
     
-    def _extract_urls_legacy_format(self, soup: BeautifulSoup, schema: Dict) -> set:
-        """使用传统格式schema提取URLs"""
-        urls = set()
+    def _resolve_url_rules(self, schema: Dict) -> tuple:
+        """
+        解析传统格式schema中的URL提取规则并缓存 (按schema对象缓存，使用期间不应修改schema)
+        
+        返回:
+            (容器选择器, 链接选择器, 链接属性, 包含模式正则, 排除模式正则)，没有对应模式时正则为None
+        """
+        cached = self._url_rules_cache.get(id(schema))
+        # 同时保存schema本身，既保证id不会被其他对象复用，也能识别出不同的schema
+        if cached is not None and cached[0] is schema:
+            return cached[1]
         
-        # 获取URL提取配置
         url_schema = schema.get('urls', schema)  # 可能在urls子字段或者直接在根层级
+        patterns = url_schema.get('patterns') or {}
+        rules = (
+            url_schema.get('container', url_schema.get('container_selector', 'body')),
+            url_schema.get('link_selector', 'a'),
+            url_schema.get('attribute', url_schema.get('url_attribute', 'href')),
+            # 多个模式合并为一个正则，每个URL各只需一次匹配
+            combine_patterns(patterns.get('include', [])),
+            combine_patterns(patterns.get('exclude', [])),
+        )
+        
+        if len(self._url_rules_cache) >= 64:
+            self._url_rules_cache.clear()
+        self._url_rules_cache[id(schema)] = (schema, rules)
+        return rules
+    
+    def _absolute_url(self, url: str) -> str:
+        """将链接转换为绝对URL，已是绝对URL时直接返回"""
+        if url.startswith(('http://', 'https://')):
+            return url
+        return _join_url(self.base_url, url)
+    
+    def _join_links(self, hrefs: Iterable[str]) -> set:
+        """
+        批量过滤并转换链接，返回绝对URL集合
+        
+        先用set在C层对原始链接去重，每个不同的链接只做一次前缀检查和URL转换；
+        跳过空链接、锚点、JavaScript、邮件和电话链接
+        """
+        absolute_url = self._absolute_url
+        return {absolute_url(url) for url in set(hrefs) if url and not url.startswith(SKIP_LINK_PREFIXES)}
+    
+    def _extract_urls_legacy_from_html(self, html_content: str, schema: Dict) -> set:
+        """
+        使用传统格式schema从HTML字符串中提取URLs
         
-        container_selector = url_schema.get('container', url_schema.get('container_selector', 'body'))
-        link_selector = url_schema.get('link_selector', 'a')
-        attribute = url_schema.get('attribute', url_schema.get('url_attribute', 'href'))
+        不限定容器且只取a标签时使用lxml增量解析，不构建完整文档树；
+        增量解析失败时解析完整文档
+        """
+        if isinstance(self._backend, BS4Backend):
+            container_selector, link_selector, attribute, _, _ = self._resolve_url_rules(schema)
+            if container_selector == 'body' and link_selector == 'a':
+                values = _stream_link_values(html_content, attribute)
+                if values is not None:
+                    return self._filter_legacy_urls(values, schema)
+        return self._extract_urls_legacy_format(self._backend.parse(html_content), schema, self._backend)
+    
+    def _extract_urls_legacy_format(self, tree: Any, schema: Dict, backend: HtmlBackend) -> set:
+        """使用传统格式schema，通过解析后端从文档树中提取URLs"""
+        values = []
+        
+        # 获取URL提取配置
+        container_selector, link_selector, attribute, _, _ = self._resolve_url_rules(schema)
         
-        # 查找容器元素
+        # 查找容器元素 (bs4后端的选择器经soupsieve编译并缓存，多个容器共用同一个编译结果)
         if container_selector != 'body':
-            containers = soup.select(container_selector)
+            containers = backend.select(tree, container_selector)
             if not containers:
-                logger.warning(f"未找到容器元素: {container_selector}，使用整个文档")
-                containers = [soup]
+                logger.warning("未找到容器元素: %s，使用整个文档", container_selector)
+                containers = [tree]
         else:
-            containers = [soup]
+            containers = [tree]
         
         # 从每个容器中提取链接
+        # 只按标签名选择a时，BeautifulSoup的find_all直接按标签名和属性过滤，无需经过soupsieve
+        find_anchors = link_selector == 'a' and isinstance(backend, BS4Backend)
         for container in containers:
-            links = container.select(link_selector)
-            logger.debug(f"在容器中找到 {len(links)} 个链接元素")
+            if find_anchors:
+                links = container.find_all('a', attrs={attribute: True})
+                logger.debug("在容器中找到 %d 个链接元素", len(links))
+                values.extend(link[attribute] for link in links)
+                continue
+            
+            links = backend.select(container, link_selector)
+            logger.debug("在容器中找到 %d 个链接元素", len(links))
             
             for link in links:
-                url = link.get(attribute)
+                url = backend.attr(link, attribute)
                 if url:
-                    # 跳过空链接、锚点链接和JavaScript链接
-                    if not url or url.startswith('#') or url.startswith('javascript:'):
-                        continue
-                    
-                    # 将相对URL转换为绝对URL
-                    absolute_url = urljoin(self.base_url, url)
-                    
-                    # 只保留同域名的URL (可选)
-                    # if urlparse(absolute_url).netloc == urlparse(self.base_url).netloc:
-                    urls.add(absolute_url)
+                    values.append(url)
+        
+        return self._filter_legacy_urls(values, schema)
+    
+    def _filter_legacy_urls(self, values: List[str], schema: Dict) -> set:
+        """将链接属性值转换为绝对URL，并应用传统格式schema的过滤模式"""
+        # 将相对URL转换为绝对URL (不限制域名)
+        urls = self._join_links(values)
         
         # 应用URL过滤模式 (如果有)
-        if 'patterns' in url_schema:
-            filtered_urls = set()
-            include_patterns = url_schema.get('patterns', {}).get('include', [])
-            exclude_patterns = url_schema.get('patterns', {}).get('exclude', [])
-            
-            for url in urls:
-                # 应用包含模式
-                if include_patterns:
-                    if not any(re.search(pattern, url) for pattern in include_patterns):
-                        continue
-                
-                # 应用排除模式
-                if exclude_patterns and any(re.search(pattern, url) for pattern in exclude_patterns):
-                    continue
-                
-                filtered_urls.add(url)
-            
-            urls = filtered_urls
+        _, _, _, include_re, exclude_re = self._resolve_url_rules(schema)
+        if include_re is not None or exclude_re is not None:
+            urls = {url for url in urls
+                    if (include_re is None or include_re.search(url))
+                    and (exclude_re is None or not exclude_re.search(url))}
         
         return urls
     
+    def _select_xpath(self, soup: BeautifulSoup, xpath: str, dom_cache: Dict) -> List[Any]:
+        """
+        使用lxml执行XPath，返回匹配的lxml元素
+        
+        同一文档的lxml树只构建一次，保存在 dom_cache 中；
+        文档是 parse() 的缓存结果时直接使用原始HTML，无需序列化文档树
+        """
+        if _etree is None:
+            logger.warning("lxml库未安装，无法使用XPath选择器")
+            return []
+        try:
+            dom = dom_cache.get('dom')
+            if dom is None:
+                html_content = self._last_html if soup is self._last_soup else str(soup)
+                dom = dom_cache['dom'] = _etree.fromstring(html_content, _XPATH_PARSER)
+            # 只保留元素节点，忽略文本和属性值结果
+            return [node for node in dom.xpath(xpath) if isinstance(node, _etree._Element)]
+        except Exception as e:
+            logger.error("XPath处理出错: %s", e)
+        return []
+    
     def _extract_urls_selectors_format(self, soup: BeautifulSoup, schema: Dict) -> set:
         """使用选择器格式schema提取URLs"""
         urls = set()
         selectors = schema.get('selectors', [])
+        dom_cache = {}
         
         for selector_def in selectors:
             # 获取选择器类型和定义
@@ -228,21 +481,10 @@ class SchemaProcessor:
             # 查找元素
             elements = []
             if css_selector:
-                elements = soup.select(css_selector)
+                elements = compile_css(css_selector).select(soup)
             elif xpath_selector:
                 # BeautifulSoup不直接支持XPath，但我们可以使用lxml
-                try:
-                    import lxml.etree
-                    dom = lxml.etree.HTML(str(soup))
-                    xpath_results = dom.xpath(xpath_selector)
-                    # 将xpath结果转换为BeautifulSoup元素
-                    for result in xpath_results:
-                        element_html = lxml.etree.tostring(result).decode('utf-8')
-                        elements.append(BeautifulSoup(element_html, 'html.parser'))
-                except ImportError:
-                    logger.warning("lxml库未安装，无法使用XPath选择器")
-                except Exception as e:
-                    logger.error(f"XPath处理出错: {e}")
+                elements = self._select_xpath(soup, xpath_selector, dom_cache)
             
             # 处理找到的元素
             for element in elements:
@@ -258,7 +500,7 @@ class SchemaProcessor:
                     # 找到目标元素
                     target = element
                     if field_selector != '.':
-                        targets = element.select(field_selector)
+                        targets = _node_select(element, field_selector)
                         if targets:
                             target = targets[0]
                     
@@ -266,15 +508,11 @@ class SchemaProcessor:
                     if field_type == 'attribute' and field_attribute:
                         url = target.get(field_attribute)
                         if url:
-                            absolute_url = urljoin(self.base_url, url)
+                            absolute_url = self._absolute_url(url)
                             urls.add(absolute_url)
                 else:
                     # 默认尝试查找所有a标签
-                    for link in element.find_all('a', href=True):
-                        url = link['href']
-                        if url and not url.startswith('#') and not url.startswith('javascript:'):
-                            absolute_url = urljoin(self.base_url, url)
-                            urls.add(absolute_url)
+                    urls |= self._join_links(_node_hrefs(element))
         
         return urls
     
@@ -294,36 +532,22 @@ class SchemaProcessor:
                 if content_areas:
                     for area in content_areas:
                         # 在内容区域中查找所有链接
-                        for link in area.find_all('a', href=True):
-                            url = link['href']
-                            if url and not url.startswith('#') and not url.startswith('javascript:'):
-                                absolute_url = urljoin(self.base_url, url)
-                                urls.add(absolute_url)
+                        urls |= self._join_links(_node_hrefs(area))
                     # 如果找到了内容区域并提取了链接，可以停止
                     if urls:
                         break
             except Exception as e:
-                logger.debug(f"在选择器 {selector} 中提取链接时出错: {e}")
+                logger.debug("在选择器 %s 中提取链接时出错: %s", selector, e)
         
         # 策略2: 如果没有找到特定内容区域，尝试查找所有链接
         if not urls:
-            for link in soup.find_all('a', href=True):
-                url = link['href']
-                if url and not url.startswith('#') and not url.startswith('javascript:'):
-                    absolute_url = urljoin(self.base_url, url)
-                    urls.add(absolute_url)
+            urls = self._join_links(_node_hrefs(soup))
         
         return urls
     
     def _extract_all_links(self, soup: BeautifulSoup) -> List[str]:
         """从页面提取所有链接"""
-        urls = set()
-        for link in soup.find_all('a', href=True):
-            url = link['href']
-            if url and not url.startswith('#') and not url.startswith('javascript:'):
-                absolute_url = urljoin(self.base_url, url)
-                urls.add(absolute_url)
-        return list(urls)
+        return list(self._join_links(_node_hrefs(soup)))
     
     def _extract_content_legacy_format(self, soup: BeautifulSoup, schema: Dict) -> Dict[str, Any]:
         """使用传统格式schema提取内容"""
@@ -338,7 +562,7 @@ class SchemaProcessor:
         if title_element:
             result['title'] = title_element.get_text().strip()
         else:
-            logger.warning(f"未找到标题元素: {title_selector}")
+            logger.warning("未找到标题元素: %s", title_selector)
             # 尝试使用页面标题
             if soup.title:
                 result['title'] = soup.title.get_text().strip()
@@ -369,28 +593,26 @@ class SchemaProcessor:
         content_element = soup.select_one(content_selector)
         
         if not content_element:
-            logger.warning(f"未找到主要内容元素: {content_selector}")
-            # 尝试常见的内容容器选择器
-            for selector in ['article', 'main', '.content', '.entry-content', '.post-content']:
-                content_element = soup.select_one(selector)
+            logger.warning("未找到主要内容元素: %s", content_selector)
+            # 尝试常见的内容容器选择器 (一次文档遍历匹配所有备选选择器)
+            fallback = select_first(soup, CONTENT_FALLBACK_SELECTORS)
+            for selector in CONTENT_FALLBACK_SELECTORS:
+                content_element = fallback.get(selector)
                 if content_element:
-                    logger.info(f"使用备选选择器找到内容: {selector}")
+                    logger.info("使用备选选择器找到内容: %s", selector)
                     break
         
         if content_element:
             # 提取原始HTML
             raw_html = str(content_element)
             result['html_content'] = raw_html
+            result[_CONVERTED_KEY] = content_element
             
-            # 移除不需要的元素
-            if "remove" in content_schema:
-                remove_selectors = content_schema.get("remove", [])
-                for selector in remove_selectors:
-                    for element in content_element.select(selector):
-                        element.decompose()
+            # 移除不需要的元素 (在副本上移除，不修改共用的文档树)
+            content_element = remove_elements(content_element, content_schema.get("remove"))
             
-            # 转换为Markdown
-            markdown = markdownify.markdownify(str(content_element), heading_style="ATX")
+            # 转换为Markdown (直接转换元素，不再序列化)
+            markdown = _element_to_markdown(content_element)
             result['raw_content'] = markdown
             result['content_markdown'] = markdown
         else:
@@ -420,6 +642,7 @@ class SchemaProcessor:
         
         # 临时存储所有提取的内容片段
         all_content_fragments = []
+        dom_cache = {}
         
         for selector_def in selectors:
             selector_type = selector_def.get('type')
@@ -432,18 +655,7 @@ class SchemaProcessor:
                 elements = soup.select(css_selector)
             elif xpath_selector:
                 # 使用lxml处理XPath
-                try:
-                    import lxml.etree
-                    dom = lxml.etree.HTML(str(soup))
-                    xpath_results = dom.xpath(xpath_selector)
-                    # 将xpath结果转换为BeautifulSoup元素
-                    for result in xpath_results:
-                        element_html = lxml.etree.tostring(result).decode('utf-8')
-                        elements.append(BeautifulSoup(element_html, 'html.parser'))
-                except ImportError:
-                    logger.warning("lxml库未安装，无法使用XPath选择器")
-                except Exception as e:
-                    logger.error(f"XPath处理出错: {e}")
+                elements = self._select_xpath(soup, xpath_selector, dom_cache)
             
             # 处理找到的元素
             for element in elements:
@@ -458,23 +670,23 @@ class SchemaProcessor:
                     # 找到目标元素
                     target = element
                     if field_selector != '.':
-                        targets = element.select(field_selector)
+                        targets = _node_select(element, field_selector)
                         if targets:
                             target = targets[0]
                     
                     # 根据字段类型提取内容
                     if field_type == 'attribute' and field_attribute:
-                        if target.has_attr(field_attribute):
-                            field_value = target[field_attribute]
+                        field_value = target.get(field_attribute)
+                        if field_value is not None:
                             result[field_name] = field_value
                             
                     elif field_type == 'text' or not field_type:
-                        field_value = target.get_text().strip()
+                        field_value = _node_text(target).strip()
                         result[field_name] = field_value
                         
                         # 如果是内容相关的字段，保存为内容片段
                         if field_name == 'content':
-                            all_content_fragments.append(str(target))
+                            all_content_fragments.append(_node_html(target))
                 
                 # 检查是否有子元素定义
                 children = selector_def.get('children', {})
@@ -487,18 +699,18 @@ class SchemaProcessor:
                             
                             if child_type == 'elements' and child_selector:
                                 # 查找所有匹配的子元素
-                                child_elements = element.select(child_selector)
+                                child_elements = _node_select(element, child_selector)
                                 
                                 # 如果是内容相关的子元素，保存为内容片段
                                 if child_name in ['content', 'paragraphs', 'sections']:
                                     for child in child_elements:
-                                        all_content_fragments.append(str(child))
+                                        all_content_fragments.append(_node_html(child))
         
         # 如果有多个内容片段，组合它们
         if all_content_fragments:
             combined_content = '\n'.join(all_content_fragments)
             # 转换为Markdown
-            markdown_content = markdownify.markdownify(combined_content, heading_style="ATX")
+            markdown_content = _to_markdown(combined_content)
             result['content_markdown'] = markdown_content
             result['html_content'] = combined_content
         
@@ -512,50 +724,28 @@ class SchemaProcessor:
         """通用的内容提取方法，尝试识别页面中的主要内容"""
         result = {}
         
-        # 提取标题
-        title_candidates = [
-            soup.find('h1'),
-            soup.select_one('header h1'),
-            soup.select_one('.entry-title'),
-            soup.select_one('.post-title'),
-            soup.select_one('article h1'),
-            soup.select_one('.headline'),
-            soup.title
-        ]
+        # 标题、内容、日期和作者的所有候选选择器在一次文档遍历中匹配
+        found = select_first(soup, _GENERIC_SELECTORS)
         
-        for candidate in title_candidates:
-            if candidate:
-                result['title'] = candidate.get_text().strip()
-                break
+        # 提取标题
+        title_element = _first_by_priority(found, _GENERIC_TITLE_SELECTORS)
+        if title_element is not None:
+            result['title'] = title_element.get_text().strip()
         
         if 'title' not in result:
             result['title'] = "未知标题"
         
         # 尝试找到主要内容区域
-        content_selectors = [
-            'article', 'main article', '.post-content', '.article-content', 
-            '.entry-content', '#content', 'main .content', 'div[itemprop="articleBody"]', 
-            '.blog-post', '.blog-entry', 'main', 'section'
-        ]
-        
-        content_element = None
-        for selector in content_selectors:
-            try:
-                elements = soup.select(selector)
-                if elements:
-                    # 使用第一个元素作为内容
-                    content_element = elements[0]
-                    break
-            except Exception as e:
-                logger.debug(f"选择器 {selector} 提取内容时出错: {e}")
+        content_element = _first_by_priority(found, _GENERIC_CONTENT_SELECTORS)
         
         if content_element:
             # 提取HTML内容
             html_content = str(content_element)
             result['html_content'] = html_content
+            result[_CONVERTED_KEY] = content_element
             
-            # 转换为Markdown
-            markdown_content = markdownify.markdownify(html_content, heading_style="ATX")
+            # 转换为Markdown (直接转换元素，不再解析上面序列化的HTML)
+            markdown_content = _element_to_markdown(content_element)
             result['raw_content'] = markdown_content
             result['content_markdown'] = markdown_content
         else:
@@ -563,48 +753,30 @@ class SchemaProcessor:
             # 如果找不到特定内容区域，使用body内容
             body = soup.find('body')
             if body:
-                html_content = str(body)
-                result['html_content'] = html_content
-                result['content_markdown'] = markdownify.markdownify(html_content, heading_style="ATX")
+                result['html_content'] = str(body)
+                result[_CONVERTED_KEY] = body
+                result['content_markdown'] = _element_to_markdown(body)
         
         # 尝试提取元数据
         try:
             # 找到发布日期
-            date_candidates = [
-                soup.select_one('time'),
-                soup.select_one('[itemprop="datePublished"]'),
-                soup.select_one('.published'),
-                soup.select_one('.post-date'),
-                soup.select_one('meta[property="article:published_time"]')
-            ]
-            
-            for candidate in date_candidates:
-                if candidate:
-                    if candidate.name == 'meta':
-                        result['date'] = candidate.get('content', '')
-                    elif candidate.has_attr('datetime'):
-                        result['date'] = candidate['datetime']
-                    else:
-                        result['date'] = candidate.get_text().strip()
-                    break
+            candidate = _first_by_priority(found, _GENERIC_DATE_SELECTORS)
+            if candidate is not None:
+                if candidate.name == 'meta':
+                    result['date'] = candidate.get('content', '')
+                elif candidate.has_attr('datetime'):
+                    result['date'] = candidate['datetime']
+                else:
+                    result['date'] = candidate.get_text().strip()
             
             # 找到作者
-            author_candidates = [
-                soup.select_one('[itemprop="author"]'),
-                soup.select_one('.author'),
-                soup.select_one('.byline'),
-                soup.select_one('[rel="author"]'),
-                soup.select_one('meta[name="author"]')
-            ]
-            
-            for candidate in author_candidates:
-                if candidate:
-                    if candidate.name == 'meta':
-                        result['author'] = candidate.get('content', '')
-                    else:
-                        result['author'] = candidate.get_text().strip()
-                    break
+            candidate = _first_by_priority(found, _GENERIC_AUTHOR_SELECTORS)
+            if candidate is not None:
+                if candidate.name == 'meta':
+                    result['author'] = candidate.get('content', '')
+                else:
+                    result['author'] = candidate.get_text().strip()
         except Exception as e:
-            logger.debug(f"提取元数据时出错: {e}")
+            logger.debug("提取元数据时出错: %s", e)
         
         return result 
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""
+内容提取器测试
+"""
+import unittest
+
+import markdownify
+
+from src.extractors.extractor import Extractor
+
+_ARTICLE = """
+<article>
+  <h2>小标题</h2>
+  <p>第一段 <a href="/a">链接</a></p>
+  <ul><li>一</li><li>二</li></ul>
+  <div class="ad">广告</div>
+</article>
+"""
+
+_PAGE = f"<html><body><h1>标题</h1>{_ARTICLE}</body></html>"
+
+class ExtractContentMarkdownTest(unittest.TestCase):
+    """extract_content 生成的Markdown与直接调用 markdownify() 的结果一致"""
+
+    def setUp(self):
+        self.extractor = Extractor("https://example.com", parser="html.parser")
+
+    def test_markdown_matches_markdownify(self):
+        result = self.extractor.extract_content(_PAGE, {"title": "h1", "content": "article"})
+        self.assertEqual(result["raw_content"], markdownify.markdownify(_ARTICLE.strip(), heading_style="ATX"))
+
+    def test_markdown_matches_markdownify_after_remove(self):
+        result = self.extractor.extract_content(_PAGE, {"content": "article", "remove": [".ad"]})
+        expected = markdownify.markdownify(_ARTICLE.strip().replace('<div class="ad">广告</div>', ''), heading_style="ATX")
+        self.assertEqual(result["raw_content"], expected)
+
+if __name__ == "__main__":
+    unittest.main()